@@ -1,13 +1,18 @@
 from pymongo import MongoClient, ASCENDING, DESCENDING
 from bson import ObjectId
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
 import json
 import hashlib
 from functools import lru_cache
+import logging
 import config
 from admin.models import TimeFilter
+from expense_tracking.analytics import expense_summary, expense_totals_by_user_pipeline
+from storage import COLLECTIONS, get_collection, user_filter, ensure_collection_indexes
 
 # MongoDB client with connection pooling for better performance
 client = MongoClient(
@@ -18,19 +23,26 @@ client = MongoClient(
 )
 db = client[config.DB_NAME]
 
-# Thread pool for parallel processing
-executor = ThreadPoolExecutor(max_workers=10)
+logger = logging.getLogger(__name__)
 
-# Collections from all services
+# Long-lived thread pool shared by admin requests (bulk metrics batches)
+executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="admin-metrics")
+
+# Length of the "most frequent" lists (queries, traded goods)
+TOP_N = 5
+
+# Users per bulk metrics aggregation
+METRICS_BATCH_SIZE = 100
+
+# Collections from all services (names and field types from the storage registry)
 users_collection = db.users
 refresh_tokens_collection = db.refresh_tokens
-expenses_collection = db.expenses
-assessments_collection = db.assessments
-predictions_collection = db.predictions
-health_assessments_collection = db.health_assessments
-loan_advice_collection = db.loan_advice
-cost_cutting_collection = db.cost_cutting_strategies
-activity_logs_collection = db.activity_logs
+expenses_collection = get_collection("expenses", db)
+predictions_collection = get_collection("predictions", db)
+financial_assessments_collection = get_collection("financial_assessments", db)
+loan_advice_collection = get_collection("loan_advice", db)
+cost_cutting_collection = get_collection("cost_cutting", db)
+activity_logs_collection = get_collection("activity_logs", db)
 
 
 def get_time_filter_query(time_filter: TimeFilter) -> Dict[str, Any]:
@@ -91,184 +103,201 @@ def get_user_auth_metrics(user_id: str, time_filter: TimeFilter) -> Dict[str, An
     }
 
 
+def format_expense_metrics(totals: Dict[str, Any], profit: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape expense analytics totals into the admin ExpenseMetrics fields"""
+    # Crops with the most expense entries
+    most_traded_goods = [
+        {"name": crop["cropType"], "count": crop["count"]}
+        for crop in sorted(totals.get("byCrop", []), key=lambda x: x["count"], reverse=True)[:TOP_N]
+    ]
+    
+    return {
+        "total_expenses": totals.get("totalCost", 0.0),
+        "total_revenue": profit.get("totalIncome", 0.0),
+        "total_profit": profit.get("profit", 0.0),
+        "expense_count": totals.get("count", 0),
+        "assessment_count": profit.get("assessmentCount", 0),
+        "most_traded_goods": most_traded_goods,
+        "financial_stability_avg": profit.get("financialStabilityAvg"),
+        "cash_flow_avg": profit.get("cashFlowAvg"),
+        "last_activity": totals.get("lastDate")
+    }
+
+
 def get_user_expense_metrics(user_id: str, time_filter: TimeFilter) -> Dict[str, Any]:
     """Get expense tracking metrics for a user"""
     time_query = get_time_filter_query(time_filter)
-    
-    # Aggregate expense data
-    expense_pipeline = [
-        {"$match": {"user_id": user_id}}
+    summary = expense_summary(user_id, start_date=time_query.get("$gte"))
+    return format_expense_metrics(
+        {**summary["totals"], "byCrop": summary["byCrop"]},
+        summary["profit"]
+    )
+
+
+def _first_or_unknown(field: str) -> Dict[str, Any]:
+    return {"$ifNull": [{"$arrayElemAt": [field, 0]}, "Unknown"]}
+
+
+def _distinct_by_user(field: str) -> List[Dict[str, Any]]:
+    """Pipeline stages collecting the distinct elements of an array field per user"""
+    return [
+        {"$unwind": field},
+        {"$group": {"_id": "$user_id", "values": {"$addToSet": field}}}
     ]
+
+
+def _forecasting_query_stages() -> List[Dict[str, Any]]:
+    """Pipeline stages giving each user's prediction count, last prediction and top queries
     
-    if time_query:
-        expense_pipeline.append({"$match": {"date": time_query}})
-    
-    expense_pipeline.extend([
-        {
-            "$group": {
-                "_id": None,
-                "total_expenses": {"$sum": "$price_etb"},
-                "expense_count": {"$sum": 1},
-                "goods": {"$push": "$goods"},
-                "last_activity": {"$max": "$date"}
-            }
-        }
-    ])
-    
-    expense_result = list(expenses_collection.aggregate(expense_pipeline))
-    expense_data = expense_result[0] if expense_result else {
-        "total_expenses": 0.0,
-        "expense_count": 0,
-        "goods": [],
-        "last_activity": None
-    }
-    
-    # Get assessment metrics
-    assessment_pipeline = [
-        {"$match": {"user_id": user_id}}
+    Predictions are grouped by (user, first region, first crop) so only each
+    user's distinct queries are sorted, and only the top TOP_N come back.
+    """
+    return [
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "region": _first_or_unknown("$input.region"),
+                "crop": _first_or_unknown("$input.cropname")
+            },
+            "count": {"$sum": 1},
+            "last_prediction": {"$max": "$created_at"}
+        }},
+        {"$sort": {"count": -1, "_id.region": 1, "_id.crop": 1}},
+        {"$group": {
+            "_id": "$_id.user_id",
+            "total_predictions": {"$sum": "$count"},
+            "last_prediction": {"$max": "$last_prediction"},
+            "queries": {"$push": {
+                "query": {"$concat": ["$_id.region", "_", "$_id.crop"]},
+                "count": "$count"
+            }}
+        }},
+        {"$project": {
+            "total_predictions": 1,
+            "last_prediction": 1,
+            "most_frequent_queries": {"$slice": ["$queries", TOP_N]}
+        }}
     ]
-    
-    if time_query:
-        assessment_pipeline.append({"$match": {"date": time_query}})
-    
-    assessment_pipeline.extend([
-        {
-            "$group": {
-                "_id": None,
-                "total_revenue": {"$sum": {"$multiply": ["$profit", 1]}},  # Assuming profit is revenue - expenses
-                "total_profit": {"$sum": "$profit"},
-                "assessment_count": {"$sum": 1},
-                "financial_stability_avg": {"$avg": {"$toDouble": "$financial_stability"}},
-                "cash_flow_avg": {"$avg": {"$toDouble": "$cash_flow"}}
-            }
-        }
-    ])
-    
-    assessment_result = list(assessments_collection.aggregate(assessment_pipeline))
-    assessment_data = assessment_result[0] if assessment_result else {
-        "total_revenue": 0.0,
-        "total_profit": 0.0,
-        "assessment_count": 0,
-        "financial_stability_avg": None,
-        "cash_flow_avg": None
+
+
+def _forecasting_metrics(doc: Dict[str, Any], regions: List[str], crops: List[str]) -> Dict[str, Any]:
+    return {
+        "total_predictions": doc.get("total_predictions", 0),
+        "regions_queried": regions,
+        "crops_queried": crops,
+        "last_prediction": doc.get("last_prediction"),
+        "most_frequent_queries": doc.get("most_frequent_queries", [])
     }
+
+
+def forecasting_metrics_by_user(user_ids: List[str], time_query: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Forecasting metrics for many users, with counting and top-N done in MongoDB
     
-    # Count most traded goods
-    goods_count = {}
-    for good in expense_data.get("goods", []):
-        goods_count[good] = goods_count.get(good, 0) + 1
-    
-    most_traded_goods = [
-        {"name": good, "count": count}
-        for good, count in sorted(goods_count.items(), key=lambda x: x[1], reverse=True)[:5]
+    Regions and crops are unwound and reduced to distinct sets on the server.
+    """
+    pipeline = [
+        {"$match": user_filter("predictions", user_ids, time_query)},
+        {"$facet": {
+            "queries": _forecasting_query_stages(),
+            "regions": _distinct_by_user("$input.region"),
+            "crops": _distinct_by_user("$input.cropname")
+        }}
     ]
-    
+    result = next(predictions_collection.aggregate(pipeline, allowDiskUse=True), {})
+    regions = {str(doc["_id"]): doc["values"] for doc in result.get("regions", [])}
+    crops = {str(doc["_id"]): doc["values"] for doc in result.get("crops", [])}
     return {
-        "total_expenses": expense_data.get("total_expenses", 0.0),
-        "total_revenue": expense_data.get("total_expenses", 0.0) + assessment_data.get("total_profit", 0.0),
-        "total_profit": assessment_data.get("total_profit", 0.0),
-        "expense_count": expense_data.get("expense_count", 0),
-        "assessment_count": assessment_data.get("assessment_count", 0),
-        "most_traded_goods": most_traded_goods,
-        "financial_stability_avg": assessment_data.get("financial_stability_avg"),
-        "cash_flow_avg": assessment_data.get("cash_flow_avg"),
-        "last_activity": expense_data.get("last_activity")
+        str(doc["_id"]): _forecasting_metrics(doc, regions.get(str(doc["_id"]), []), crops.get(str(doc["_id"]), []))
+        for doc in result.get("queries", [])
     }
 
 
 def get_user_forecasting_metrics(user_id: str, time_filter: TimeFilter) -> Dict[str, Any]:
     """Get forecasting metrics for a user"""
     time_query = get_time_filter_query(time_filter)
-    
-    # Query predictions
-    query = {"user_id": user_id}
-    if time_query:
-        query["timestamp"] = time_query
-    
-    predictions = list(predictions_collection.find(query))
-    
-    regions = set()
-    crops = set()
-    last_prediction = None
-    
-    for pred in predictions:
-        if "region" in pred:
-            regions.update(pred.get("region", []))
-        if "cropname" in pred:
-            crops.update(pred.get("cropname", []))
-        if "timestamp" in pred:
-            if not last_prediction or pred["timestamp"] > last_prediction:
-                last_prediction = pred["timestamp"]
-    
-    # Count query frequencies
-    query_count = {}
-    for pred in predictions:
-        key = f"{pred.get('region', ['Unknown'])[0]}_{pred.get('cropname', ['Unknown'])[0]}"
-        query_count[key] = query_count.get(key, 0) + 1
-    
-    most_frequent_queries = [
-        {"query": key, "count": count}
-        for key, count in sorted(query_count.items(), key=lambda x: x[1], reverse=True)[:5]
+    return forecasting_metrics_by_user([user_id], time_query).get(user_id, _forecasting_metrics({}, [], []))
+
+
+# Health and profit metrics both come from the financial assessments, in one $group
+_ASSESSMENT_GROUP = {
+    "$group": {
+        "_id": "$user_id",
+        "total_assessments": {"$sum": 1},
+        "crop_types": {"$addToSet": "$input.cropType"},
+        "total_subsidies": {"$sum": "$input.governmentSubsidy"},
+        "last_assessment": {"$max": "$created_at"},
+        "total_revenue": {"$sum": {"$multiply": ["$input.salePricePerQuintal", "$input.quantitySold"]}},
+        "total_cost": {"$sum": "$input.totalCost"},
+        # Field names expected by format_expense_metrics
+        "totalIncome": {"$sum": "$output.totalIncome"},
+        "profit": {"$sum": "$output.profit"},
+        "assessmentCount": {"$sum": 1},
+        "financialStabilityAvg": {"$avg": "$output.financialStability"},
+        "cashFlowAvg": {"$avg": "$output.cashFlow"}
+    }
+}
+
+
+def _health_metrics(doc: Dict[str, Any]) -> Dict[str, Any]:
+    total_revenue = doc.get("total_revenue", 0)
+    total_profit = total_revenue - doc.get("total_cost", 0)
+    return {
+        "total_assessments": doc.get("total_assessments", 0),
+        "crop_types_assessed": list(doc.get("crop_types", [])),
+        "average_profit_margin": (total_profit / total_revenue * 100) if total_revenue > 0 else None,
+        "total_subsidies": doc.get("total_subsidies", 0.0),
+        "last_assessment": doc.get("last_assessment")
+    }
+
+
+def health_metrics_by_user(user_ids: List[str], time_query: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Health assessment metrics for many users, totals computed in MongoDB"""
+    pipeline = [
+        {"$match": user_filter("financial_assessments", user_ids, time_query)},
+        _ASSESSMENT_GROUP
     ]
-    
     return {
-        "total_predictions": len(predictions),
-        "regions_queried": list(regions),
-        "crops_queried": list(crops),
-        "last_prediction": last_prediction,
-        "most_frequent_queries": most_frequent_queries
+        str(doc["_id"]): _health_metrics(doc)
+        for doc in financial_assessments_collection.aggregate(pipeline, allowDiskUse=True)
     }
 
 
 def get_user_health_metrics(user_id: str, time_filter: TimeFilter) -> Dict[str, Any]:
     """Get health assessment metrics for a user"""
     time_query = get_time_filter_query(time_filter)
+    return health_metrics_by_user([user_id], time_query).get(user_id, _health_metrics({}))
+
+
+_RECOMMENDATION_GROUP = {
+    "$group": {
+        "_id": "$user_id",
+        "count": {"$sum": 1},
+        "last_timestamp": {"$max": "$created_at"}
+    }
+}
+
+
+def _recommendation_metrics(loan: Dict[str, Any], cost: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine per-user loan advice and cost cutting counts"""
+    last_recommendation = None
+    if loan.get("last_timestamp") and cost.get("last_timestamp"):
+        last_recommendation = max(loan["last_timestamp"], cost["last_timestamp"])
+    elif loan.get("last_timestamp"):
+        last_recommendation = loan["last_timestamp"]
+    elif cost.get("last_timestamp"):
+        last_recommendation = cost["last_timestamp"]
     
-    query = {"user_id": user_id}
-    if time_query:
-        query["timestamp"] = time_query
-    
-    assessments = list(health_assessments_collection.find(query))
-    
-    if not assessments:
-        return {
-            "total_assessments": 0,
-            "crop_types_assessed": [],
-            "average_profit_margin": None,
-            "total_subsidies": 0.0,
-            "last_assessment": None
-        }
-    
-    crop_types = set()
-    total_profit = 0.0
-    total_revenue = 0.0
-    total_subsidies = 0.0
-    last_assessment = None
-    
-    for assessment in assessments:
-        if "cropType" in assessment:
-            crop_types.add(assessment["cropType"])
-        
-        sale_price = assessment.get("salePricePerQuintal", 0) * assessment.get("quantitySold", 0)
-        total_cost = assessment.get("totalCost", 0)
-        profit = sale_price - total_cost
-        
-        total_profit += profit
-        total_revenue += sale_price
-        total_subsidies += assessment.get("governmentSubsidy", 0)
-        
-        if "timestamp" in assessment:
-            if not last_assessment or assessment["timestamp"] > last_assessment:
-                last_assessment = assessment["timestamp"]
-    
-    avg_profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else None
+    topics = []
+    if loan.get("count", 0) > 0:
+        topics.append("loan_advice")
+    if cost.get("count", 0) > 0:
+        topics.append("cost_cutting_strategies")
     
     return {
-        "total_assessments": len(assessments),
-        "crop_types_assessed": list(crop_types),
-        "average_profit_margin": avg_profit_margin,
-        "total_subsidies": total_subsidies,
-        "last_assessment": last_assessment
+        "loan_advice_count": loan.get("count", 0),
+        "cost_cutting_count": cost.get("count", 0),
+        "last_recommendation": last_recommendation,
+        "recommendation_topics": topics
     }
 
 
@@ -277,52 +306,27 @@ def get_user_recommendation_metrics(user_id: str, time_filter: TimeFilter) -> Di
     time_query = get_time_filter_query(time_filter)
     
     # Query loan advice
-    loan_query = {"user_id": user_id}
-    if time_query:
-        loan_query["timestamp"] = time_query
-    
-    loan_count = loan_advice_collection.count_documents(loan_query)
+    loan_count = loan_advice_collection.count_documents(user_filter("loan_advice", [user_id], time_query))
     
     # Query cost cutting strategies
-    cost_query = {"user_id": user_id}
-    if time_query:
-        cost_query["timestamp"] = time_query
-    
-    cost_count = cost_cutting_collection.count_documents(cost_query)
+    cost_count = cost_cutting_collection.count_documents(user_filter("cost_cutting", [user_id], time_query))
     
     # Get last recommendation
     last_loan = loan_advice_collection.find_one(
-        {"user_id": user_id},
-        sort=[("timestamp", -1)]
-    )
+        user_filter("loan_advice", [user_id]),
+        {"created_at": 1},
+        sort=[("created_at", -1)]
+    ) or {}
     last_cost = cost_cutting_collection.find_one(
-        {"user_id": user_id},
-        sort=[("timestamp", -1)]
+        user_filter("cost_cutting", [user_id]),
+        {"created_at": 1},
+        sort=[("created_at", -1)]
+    ) or {}
+    
+    return _recommendation_metrics(
+        {"count": loan_count, "last_timestamp": last_loan.get("created_at")},
+        {"count": cost_count, "last_timestamp": last_cost.get("created_at")}
     )
-    
-    last_recommendation = None
-    if last_loan and last_cost:
-        last_recommendation = max(
-            last_loan.get("timestamp", datetime.min),
-            last_cost.get("timestamp", datetime.min)
-        )
-    elif last_loan:
-        last_recommendation = last_loan.get("timestamp")
-    elif last_cost:
-        last_recommendation = last_cost.get("timestamp")
-    
-    topics = []
-    if loan_count > 0:
-        topics.append("loan_advice")
-    if cost_count > 0:
-        topics.append("cost_cutting_strategies")
-    
-    return {
-        "loan_advice_count": loan_count,
-        "cost_cutting_count": cost_count,
-        "last_recommendation": last_recommendation,
-        "recommendation_topics": topics
-    }
 
 
 def calculate_engagement_score(user_data: Dict[str, Any]) -> float:
@@ -448,322 +452,230 @@ def ensure_indexes():
         users_collection.create_index([("created_at", DESCENDING)])
         users_collection.create_index([("location", ASCENDING)])
         
-        # Activity logs indexes
-        activity_logs_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        activity_logs_collection.create_index([("action", ASCENDING)])
-        
-        # Expenses indexes
-        expenses_collection.create_index([("user_id", ASCENDING), ("date", DESCENDING)])
-        
-        # Predictions indexes
-        predictions_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        
-        # Health assessments indexes
-        health_assessments_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        
-        # Loan advice indexes
-        loan_advice_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        
-        # Cost cutting indexes
-        cost_cutting_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+        # Activity logs, expenses and the service history collections
+        # (indexes are defined with the collections in storage.collections)
+        ensure_collection_indexes(db)
         
         print("Database indexes created successfully")
     except Exception as e:
         print(f"Index creation error: {e}")
 
 
+def _metrics_source(section: str, stages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stages of one metrics source, ending in {_id: <user id string>, <section>: {...}}"""
+    return stages + [{"$project": {"_id": {"$toString": "$_id"}, section: "$$ROOT"}}]
+
+
+def farmer_metrics_pipeline(user_ids: List[str], time_query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One aggregation, run on the activity logs, computing every service's metrics for the users
+    
+    Each service collection is read by its own $unionWith sub-pipeline, which
+    matches on the registered (user_id, time) index and reduces to one
+    document per user under its section name; the final $group merges the
+    sections of each user into a single document.
+    """
+    sources = [
+        ("auth", "activity_logs", [
+            {"$match": {**user_filter("activity_logs", user_ids, time_query), "action": "login"}},
+            {"$group": {
+                "_id": "$user_id",
+                "total_logins": {"$sum": 1},
+                "last_login": {"$max": "$timestamp"}
+            }}
+        ]),
+        ("expenses", "expenses", expense_totals_by_user_pipeline(user_ids, time_query.get("$gte"), top_crops=TOP_N)),
+        ("assessments", "financial_assessments", [
+            {"$match": user_filter("financial_assessments", user_ids, time_query)},
+            _ASSESSMENT_GROUP
+        ]),
+        ("forecasting", "predictions", [
+            {"$match": user_filter("predictions", user_ids, time_query)},
+            *_forecasting_query_stages()
+        ]),
+        ("regions", "predictions", [
+            {"$match": user_filter("predictions", user_ids, time_query)},
+            *_distinct_by_user("$input.region")
+        ]),
+        ("crops", "predictions", [
+            {"$match": user_filter("predictions", user_ids, time_query)},
+            *_distinct_by_user("$input.cropname")
+        ]),
+        ("loan", "loan_advice", [
+            {"$match": user_filter("loan_advice", user_ids, time_query)},
+            _RECOMMENDATION_GROUP
+        ]),
+        ("cost", "cost_cutting", [
+            {"$match": user_filter("cost_cutting", user_ids, time_query)},
+            _RECOMMENDATION_GROUP
+        ])
+    ]
+    
+    return _union_pipeline(sources)
+
+
+def _union_pipeline(sources: List[tuple]) -> List[Dict[str, Any]]:
+    """Chain (section, collection key, stages) sources with $unionWith and merge them by _id"""
+    (first_section, _, first_stages), others = sources[0], sources[1:]
+    pipeline = _metrics_source(first_section, first_stages)
+    for section, key, stages in others:
+        pipeline.append({"$unionWith": {
+            "coll": COLLECTIONS[key].name,
+            "pipeline": _metrics_source(section, stages)
+        }})
+    pipeline.append({"$group": {
+        "_id": "$_id",
+        **{section: {"$mergeObjects": f"${section}"} for section, _, _ in sources}
+    }})
+    return pipeline
+
+
+def _farmer_totals(key: str, match: Dict[str, Any], sums: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Stages summing a collection over registered non-admin users only
+
+    Records are first reduced to one group per user_id, so the $lookup
+    against users runs once per distinct user rather than once per record.
+    Records of deleted users, and records with a missing or malformed
+    user_id, find no user and are left out.
+    """
+    stages = [
+        {"$match": match},
+        {"$group": {"_id": "$user_id", "count": {"$sum": 1}, **sums}},
+    ]
+    local_field = "_id"
+    if COLLECTIONS[key].user_id_type is not ObjectId:
+        stages.append({"$addFields": {"farmer_id": {
+            "$convert": {"input": "$_id", "to": "objectId", "onError": None, "onNull": None}
+        }}})
+        local_field = "farmer_id"
+    stages += [
+        {"$lookup": {"from": users_collection.name, "localField": local_field, "foreignField": "_id", "as": "farmer"}},
+        {"$match": {"farmer": {"$elemMatch": {"is_admin": {"$ne": True}}}}},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": "$count"},
+            **{field: {"$sum": f"${field}"} for field in sums}
+        }}
+    ]
+    return stages
+
+
+def get_system_totals(time_filter: TimeFilter) -> Dict[str, Any]:
+    """Service usage and financial totals across all farmers (registered non-admin users)
+    
+    Computed with server-side stages in one aggregation, so the cost does
+    not depend on holding any per-user data in memory. Totals cover the same
+    users as the farmer counts they are averaged over.
+    """
+    time_query = get_time_filter_query(time_filter)
+
+    def time_match(key: str) -> Dict[str, Any]:
+        return {COLLECTIONS[key].time_field: time_query} if time_query else {}
+
+    sources = [
+        ("auth", "activity_logs", _farmer_totals(
+            "activity_logs", {**time_match("activity_logs"), "action": "login"}, {}
+        )),
+        ("expenses", "expenses", _farmer_totals(
+            "expenses", {**time_match("expenses"), "deleted": {"$ne": True}}, {"totalCost": {"$sum": "$totalCost"}}
+        )),
+        ("assessments", "financial_assessments", _farmer_totals(
+            "financial_assessments", time_match("financial_assessments"),
+            {"totalIncome": {"$sum": "$output.totalIncome"}, "profit": {"$sum": "$output.profit"}}
+        )),
+        ("predictions", "predictions", _farmer_totals("predictions", time_match("predictions"), {})),
+        ("loan", "loan_advice", _farmer_totals("loan_advice", time_match("loan_advice"), {})),
+        ("cost", "cost_cutting", _farmer_totals("cost_cutting", time_match("cost_cutting"), {})),
+    ]
+    doc = next(activity_logs_collection.aggregate(_union_pipeline(sources), allowDiskUse=True), {})
+    sections = {name: doc.get(name) or {} for name, _, _ in sources}
+    
+    return {
+        "auth_logins": sections["auth"].get("count", 0),
+        "expense_entries": sections["expenses"].get("count", 0),
+        "total_expenses": sections["expenses"].get("totalCost", 0.0),
+        "total_revenue": sections["assessments"].get("totalIncome", 0.0),
+        "total_profit": sections["assessments"].get("profit", 0.0),
+        "health_assessments": sections["assessments"].get("count", 0),
+        "predictions_made": sections["predictions"].get("count", 0),
+        "recommendations_given": sections["loan"].get("count", 0) + sections["cost"].get("count", 0)
+    }
+
+
 @lru_cache(maxsize=128)
 def get_bulk_farmer_metrics(user_ids_tuple: tuple, time_filter: TimeFilter) -> Dict[str, Dict[str, Any]]:
-    """Get metrics for multiple farmers in bulk using parallel processing
+    """Get metrics for multiple farmers in bulk, cached per batch and filter"""
+    return compute_bulk_farmer_metrics(list(user_ids_tuple), time_filter)
+
+
+def compute_bulk_farmer_metrics(user_ids: List[str], time_filter: TimeFilter) -> Dict[str, Dict[str, Any]]:
+    """Get metrics for multiple farmers in bulk with a single aggregation
     
-    This function dramatically improves performance by:
-    1. Fetching data for multiple users in single queries
-    2. Using parallel processing for independent operations
-    3. Caching results
+    All service collections are read in one round trip (see
+    farmer_metrics_pipeline). Errors are logged and raised, so callers
+    (and the lru_cache above) never take an empty result for a real one.
     """
     try:
-        user_ids = list(user_ids_tuple)  # Convert tuple back to list
         time_query = get_time_filter_query(time_filter)
-        results = {}
         
-        # Create a new executor for this operation to avoid shutdown issues
-        with ThreadPoolExecutor(max_workers=5) as local_executor:
-            # Parallel aggregation pipelines
-            def get_auth_metrics():
-                pipeline = [
-                    {"$match": {"user_id": {"$in": user_ids}, "action": "login"}},
-                ]
-                if time_query:
-                    pipeline.append({"$match": {"timestamp": time_query}})
-                
-                pipeline.extend([
-                    {"$group": {
-                        "_id": "$user_id",
-                        "total_logins": {"$sum": 1},
-                        "last_login": {"$max": "$timestamp"}
-                    }}
-                ])
-                
-                return {doc["_id"]: doc for doc in activity_logs_collection.aggregate(pipeline)}
-            
-            def get_expense_metrics():
-                pipeline = [
-                    {"$match": {"user_id": {"$in": user_ids}}},
-                ]
-                if time_query:
-                    pipeline.append({"$match": {"date": time_query}})
-                
-                pipeline.extend([
-                    {"$group": {
-                        "_id": "$user_id",
-                        "total_expenses": {"$sum": "$price_etb"},
-                        "expense_count": {"$sum": 1},
-                        "goods": {"$push": "$goods"},
-                        "last_activity": {"$max": "$date"}
-                    }}
-                ])
-                
-                expenses_data = {doc["_id"]: doc for doc in expenses_collection.aggregate(pipeline, allowDiskUse=True)}
-                
-                # Get assessment data
-                assessment_pipeline = [
-                    {"$match": {"user_id": {"$in": user_ids}}},
-                ]
-                if time_query:
-                    assessment_pipeline.append({"$match": {"date": time_query}})
-                
-                assessment_pipeline.extend([
-                    {"$group": {
-                        "_id": "$user_id",
-                        "total_profit": {"$sum": "$profit"},
-                        "assessment_count": {"$sum": 1},
-                        "financial_stability_avg": {"$avg": {"$toDouble": "$financial_stability"}},
-                        "cash_flow_avg": {"$avg": {"$toDouble": "$cash_flow"}}
-                    }}
-                ])
-                
-                assessments_data = {doc["_id"]: doc for doc in assessments_collection.aggregate(assessment_pipeline, allowDiskUse=True)}
-                
-                # Merge data
-                merged = {}
-                for uid in user_ids:
-                    expense = expenses_data.get(uid, {})
-                    assessment = assessments_data.get(uid, {})
-                    
-                    # Process goods
-                    goods_count = {}
-                    for good in expense.get("goods", []):
-                        goods_count[good] = goods_count.get(good, 0) + 1
-                    
-                    most_traded_goods = [
-                        {"name": good, "count": count}
-                        for good, count in sorted(goods_count.items(), key=lambda x: x[1], reverse=True)[:5]
-                    ]
-                    
-                    merged[uid] = {
-                        "total_expenses": expense.get("total_expenses", 0.0),
-                        "total_revenue": expense.get("total_expenses", 0.0) + assessment.get("total_profit", 0.0),
-                        "total_profit": assessment.get("total_profit", 0.0),
-                        "expense_count": expense.get("expense_count", 0),
-                        "assessment_count": assessment.get("assessment_count", 0),
-                        "most_traded_goods": most_traded_goods,
-                        "financial_stability_avg": assessment.get("financial_stability_avg"),
-                        "cash_flow_avg": assessment.get("cash_flow_avg"),
-                        "last_activity": expense.get("last_activity")
-                    }
-                
-                return merged
-            
-            def get_forecasting_metrics():
-                pipeline = [
-                    {"$match": {"user_id": {"$in": user_ids}}},
-                ]
-                if time_query:
-                    pipeline.append({"$match": {"timestamp": time_query}})
-                
-                pipeline.extend([
-                    {"$group": {
-                        "_id": "$user_id",
-                        "total_predictions": {"$sum": 1},
-                        "regions": {"$addToSet": "$region"},
-                        "crops": {"$addToSet": "$cropname"},
-                        "last_prediction": {"$max": "$timestamp"},
-                        "queries": {"$push": {"region": "$region", "crop": "$cropname"}}
-                    }}
-                ])
-                
-                forecast_data = {}
-                for doc in predictions_collection.aggregate(pipeline, allowDiskUse=True):
-                    # Process query frequencies
-                    query_count = {}
-                    for query in doc.get("queries", []):
-                        region_list = query.get('region', ['Unknown'])
-                        crop_list = query.get('crop', ['Unknown'])
-                        region = region_list[0] if isinstance(region_list, list) and region_list else 'Unknown'
-                        crop = crop_list[0] if isinstance(crop_list, list) and crop_list else 'Unknown'
-                        key = f"{region}_{crop}"
-                        query_count[key] = query_count.get(key, 0) + 1
-                    
-                    most_frequent = [
-                        {"query": k, "count": v}
-                        for k, v in sorted(query_count.items(), key=lambda x: x[1], reverse=True)[:5]
-                    ]
-                    
-                    # Flatten nested lists
-                    regions = doc.get("regions", [])
-                    crops = doc.get("crops", [])
-                    flat_regions = []
-                    flat_crops = []
-                    
-                    for r in regions:
-                        if isinstance(r, list):
-                            flat_regions.extend(r)
-                        else:
-                            flat_regions.append(r)
-                    
-                    for c in crops:
-                        if isinstance(c, list):
-                            flat_crops.extend(c)
-                        else:
-                            flat_crops.append(c)
-                    
-                    forecast_data[doc["_id"]] = {
-                        "total_predictions": doc.get("total_predictions", 0),
-                        "regions_queried": list(set(flat_regions)),
-                        "crops_queried": list(set(flat_crops)),
-                        "last_prediction": doc.get("last_prediction"),
-                        "most_frequent_queries": most_frequent
-                    }
-                
-                return forecast_data
-            
-            def get_health_metrics():
-                pipeline = [
-                    {"$match": {"user_id": {"$in": user_ids}}},
-                ]
-                if time_query:
-                    pipeline.append({"$match": {"timestamp": time_query}})
-                
-                pipeline.extend([
-                    {"$group": {
-                        "_id": "$user_id",
-                        "total_assessments": {"$sum": 1},
-                        "crop_types": {"$addToSet": "$cropType"},
-                        "total_subsidies": {"$sum": "$governmentSubsidy"},
-                        "last_assessment": {"$max": "$timestamp"},
-                        "assessments": {"$push": {
-                            "sale_price": {"$multiply": ["$salePricePerQuintal", "$quantitySold"]},
-                            "total_cost": "$totalCost"
-                        }}
-                    }}
-                ])
-                
-                health_data = {}
-                for doc in health_assessments_collection.aggregate(pipeline, allowDiskUse=True):
-                    # Calculate profit margin
-                    total_revenue = sum(a.get("sale_price", 0) for a in doc.get("assessments", []))
-                    total_cost = sum(a.get("total_cost", 0) for a in doc.get("assessments", []))
-                    total_profit = total_revenue - total_cost
-                    avg_profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else None
-                    
-                    health_data[doc["_id"]] = {
-                        "total_assessments": doc.get("total_assessments", 0),
-                        "crop_types_assessed": list(doc.get("crop_types", [])),
-                        "average_profit_margin": avg_profit_margin,
-                        "total_subsidies": doc.get("total_subsidies", 0.0),
-                        "last_assessment": doc.get("last_assessment")
-                    }
-                
-                return health_data
-            
-            def get_recommendation_metrics():
-                # Loan advice
-                loan_pipeline = [
-                    {"$match": {"user_id": {"$in": user_ids}}},
-                ]
-                if time_query:
-                    loan_pipeline.append({"$match": {"timestamp": time_query}})
-                
-                loan_pipeline.extend([
-                    {"$group": {
-                        "_id": "$user_id",
-                        "count": {"$sum": 1},
-                        "last_timestamp": {"$max": "$timestamp"}
-                    }}
-                ])
-                
-                loan_data = {doc["_id"]: doc for doc in loan_advice_collection.aggregate(loan_pipeline)}
-                
-                # Cost cutting
-                cost_pipeline = [
-                    {"$match": {"user_id": {"$in": user_ids}}},
-                ]
-                if time_query:
-                    cost_pipeline.append({"$match": {"timestamp": time_query}})
-                
-                cost_pipeline.extend([
-                    {"$group": {
-                        "_id": "$user_id",
-                        "count": {"$sum": 1},
-                        "last_timestamp": {"$max": "$timestamp"}
-                    }}
-                ])
-                
-                cost_data = {doc["_id"]: doc for doc in cost_cutting_collection.aggregate(cost_pipeline)}
-                
-                # Merge recommendation data
-                rec_data = {}
-                for uid in user_ids:
-                    loan = loan_data.get(uid, {})
-                    cost = cost_data.get(uid, {})
-                    
-                    last_recommendation = None
-                    if loan.get("last_timestamp") and cost.get("last_timestamp"):
-                        last_recommendation = max(loan["last_timestamp"], cost["last_timestamp"])
-                    elif loan.get("last_timestamp"):
-                        last_recommendation = loan["last_timestamp"]
-                    elif cost.get("last_timestamp"):
-                        last_recommendation = cost["last_timestamp"]
-                    
-                    topics = []
-                    if loan.get("count", 0) > 0:
-                        topics.append("loan_advice")
-                    if cost.get("count", 0) > 0:
-                        topics.append("cost_cutting_strategies")
-                    
-                    rec_data[uid] = {
-                        "loan_advice_count": loan.get("count", 0),
-                        "cost_cutting_count": cost.get("count", 0),
-                        "last_recommendation": last_recommendation,
-                        "recommendation_topics": topics
-                    }
-                
-                return rec_data
-            
-            # Execute all queries in parallel
-            auth_future = local_executor.submit(get_auth_metrics)
-            expense_future = local_executor.submit(get_expense_metrics)
-            forecast_future = local_executor.submit(get_forecasting_metrics)
-            health_future = local_executor.submit(get_health_metrics)
-            rec_future = local_executor.submit(get_recommendation_metrics)
-            
-            auth_data = auth_future.result()
-            expense_data = expense_future.result()
-            forecast_data = forecast_future.result()
-            health_data = health_future.result()
-            rec_data = rec_future.result()
-            
-            # Combine all metrics
-            for uid in user_ids:
-                results[uid] = {
-                    "auth_metrics": auth_data.get(uid, {"total_logins": 0, "last_login": None}),
-                    "expense_metrics": expense_data.get(uid, {}),
-                    "forecasting_metrics": forecast_data.get(uid, {}),
-                    "health_metrics": health_data.get(uid, {}),
-                    "recommendation_metrics": rec_data.get(uid, {})
-                }
+        pipeline = farmer_metrics_pipeline(user_ids, time_query)
+        merged = {
+            doc["_id"]: doc
+            for doc in activity_logs_collection.aggregate(pipeline, allowDiskUse=True)
+        }
+        
+        results = {}
+        for uid in user_ids:
+            doc = merged.get(uid, {})
+            forecasting = doc.get("forecasting") or {}
+            assessments = doc.get("assessments") or {}
+            results[uid] = {
+                "auth_metrics": {
+                    "total_logins": (doc.get("auth") or {}).get("total_logins", 0),
+                    "last_login": (doc.get("auth") or {}).get("last_login")
+                },
+                "expense_metrics": format_expense_metrics(doc.get("expenses") or {}, assessments),
+                "forecasting_metrics": _forecasting_metrics(
+                    forecasting,
+                    (doc.get("regions") or {}).get("values", []),
+                    (doc.get("crops") or {}).get("values", [])
+                ) if forecasting else {},
+                "health_metrics": _health_metrics(assessments) if assessments else {},
+                "recommendation_metrics": _recommendation_metrics(doc.get("loan") or {}, doc.get("cost") or {})
+            }
         
         return results
-    except Exception as e:
-        print(f"Error in get_bulk_farmer_metrics: {e}")
-        return {} 
\ No newline at end of file
+    except Exception:
+        logger.exception("Bulk farmer metrics failed for %d users", len(user_ids))
+        raise
+
+
+def iter_bulk_farmer_metrics(user_ids: Iterable[str], time_filter: TimeFilter, batch_size: int = METRICS_BATCH_SIZE, max_in_flight: int = 4):
+    """Metrics for many farmers, fetched batch by batch on the shared executor
+    
+    ``user_ids`` may be a cursor or generator: it is consumed lazily, with at
+    most ``max_in_flight`` batches submitted at a time, and one dict of
+    user_id -> metrics is yielded per batch, in order. Results are not
+    cached, so memory stays bounded by the batches in flight.
+    """
+    pending = deque()
+    ids = iter(user_ids)
+    while True:
+        batch = list(islice(ids, batch_size))
+        if batch:
+            pending.append(executor.submit(compute_bulk_farmer_metrics, batch, time_filter))
+        if pending and (len(pending) >= max_in_flight or not batch):
+            yield pending.popleft().result()
+        elif not batch:
+            return
+
+
+def count_farmers_needing_attention(user_ids: Iterable[str], time_filter: TimeFilter) -> int:
+    """How many of the farmers need admin attention, streaming their metrics batch by batch"""
+    needing_attention = 0
+    for batch_metrics in iter_bulk_farmer_metrics(user_ids, time_filter):
+        for metrics in batch_metrics.values():
+            engagement_score = calculate_engagement_score(metrics)
+            risk_level = assess_risk_level(metrics)
+            if check_needs_attention({**metrics, "engagement_score": engagement_score, "risk_level": risk_level}):
+                needing_attention += 1
+    return needing_attention
@@ -126,6 +126,10 @@ class DashboardSummary(BaseModel):
     # Time period
     time_filter: TimeFilter = Field(TimeFilter.all)
     generated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    # Background snapshot the summary was served from
+    computed_at: Optional[datetime] = Field(None, description="When the snapshot was computed")
+    snapshot_version: Optional[int] = Field(None, description="Snapshot version for this time filter")
 
 
 class AdminUser(BaseModel):
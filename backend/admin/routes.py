@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+import config
+
 from admin.models import (
     DashboardFilters, DashboardSummary, FarmerDashboardData,
     TimeFilter, ServiceFilter
@@ -12,11 +15,16 @@ from admin.services import (
     log_admin_activity, get_admin_users, create_admin_user, 
     update_admin_user, delete_admin_user
 )
+from admin.snapshots import get_dashboard_snapshots
 from admin.dependencies import (
     get_current_admin_user, get_current_super_admin,
     require_permission, AdminPermissions
 )
 from security.rate_limiter import limiter
+from model_store import model_status, reload_models
+from translation import get_translation_cache
+from chatbot.answer_cache import get_answer_cache
+from chatbot.resilience import get_guards
 
 router = APIRouter(
     prefix="/admin",
@@ -38,6 +46,7 @@ router = APIRouter(
 async def get_admin_dashboard_summary(
     request: Request,
     time_filter: TimeFilter = Query(TimeFilter.all, description="Time period for data aggregation"),
+    fresh: bool = Query(False, description="Recompute now instead of serving the latest snapshot"),
     admin_user: Dict[str, Any] = Depends(get_current_admin_user)
 ):
     """
@@ -50,6 +59,10 @@ async def get_admin_dashboard_summary(
     - Regional distribution
     - Farmers needing attention
     
+    Summaries are recomputed in the background; the latest snapshot is
+    served with its computed_at time unless fresh=true is passed. A fresh
+    request that cannot be recomputed returns 503.
+    
     Requires admin authentication.
     """
     admin_id = str(admin_user["_id"])
@@ -61,8 +74,18 @@ async def get_admin_dashboard_summary(
         details={"time_filter": time_filter.value}
     )
     
-    summary = get_dashboard_summary(time_filter)
-    return summary
+    if not config.ADMIN_SNAPSHOT_ENABLED:
+        return await run_in_threadpool(get_dashboard_summary, time_filter)
+    snapshots = get_dashboard_snapshots()
+    if fresh:
+        try:
+            return await run_in_threadpool(snapshots.refresh, time_filter, True)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Dashboard summary could not be recomputed; try again or omit fresh for the latest snapshot"
+            )
+    return await run_in_threadpool(snapshots.latest, time_filter)
 
 
 @router.get(
@@ -524,6 +547,106 @@ async def delete_admin_user_endpoint(
         )
 
 
+@router.get(
+    "/models",
+    summary="Get Model Status",
+    description="Get the active model version, artifact checksums and reload state"
+)
+@limiter.limit("30/minute")
+async def get_model_status(
+    request: Request,
+    admin_user: Dict[str, Any] = Depends(require_permission(AdminPermissions.VIEW_SYSTEM_METRICS))
+):
+    """
+    Get the status of the model store in the worker serving this request.
+    
+    Returns the active version, which artifacts are loaded, their checksums,
+    the versions available under MODEL_DIR/versions and any reload in progress.
+    """
+    return model_status()
+
+
+@router.post(
+    "/models/reload",
+    summary="Reload Models",
+    description="Load a model version in the background and swap it in atomically"
+)
+@limiter.limit("5/minute")
+async def reload_models_endpoint(
+    request: Request,
+    version: Optional[str] = Query(None, description="Version under MODEL_DIR/versions; omit for the default bundle"),
+    admin_user: Dict[str, Any] = Depends(get_current_super_admin)
+):
+    """
+    Switch the active model version without restarting the server.
+    
+    The new bundle is loaded and checksum-verified in the background and then
+    swapped in; in-flight requests finish with the previous version.
+    Other workers pick up the switch from MODEL_DIR/CURRENT.
+    Only super admins can reload models.
+    """
+    try:
+        state = reload_models(version)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    # Log activity
+    log_admin_activity(
+        admin_id=str(admin_user["_id"]),
+        action="reload_models",
+        details={"version": version}
+    )
+    
+    return state
+
+
+@router.get(
+    "/system/cache-stats",
+    summary="Get Cache Statistics",
+    description="Get hit/miss statistics for the shared caches in this worker"
+)
+@limiter.limit("30/minute")
+async def get_cache_stats(
+    request: Request,
+    admin_user: Dict[str, Any] = Depends(require_permission(AdminPermissions.VIEW_SYSTEM_METRICS))
+):
+    """
+    Get per-worker cache statistics.
+    
+    Includes memory/store hits, misses and hit rate of the translation cache
+    used by the chatbot and translated recommendation texts, and of the
+    chatbot's answer cache for near-duplicate questions.
+    """
+    answer_cache = get_answer_cache()
+    return {
+        "translation": get_translation_cache().stats(),
+        "chatbot_answers": answer_cache.stats() if answer_cache else None
+    }
+
+
+@router.get(
+    "/system/dependencies",
+    summary="Get External Dependency Status",
+    description="Get circuit breaker state and call counters for the chatbot's upstream services"
+)
+@limiter.limit("30/minute")
+async def get_dependency_status(
+    request: Request,
+    admin_user: Dict[str, Any] = Depends(require_permission(AdminPermissions.VIEW_SYSTEM_METRICS))
+):
+    """
+    Get per-worker status of the chatbot's external dependencies.
+    
+    For the LLM and the translator: circuit state (closed, open or
+    half_open), consecutive failures, calls in flight and counts of
+    timeouts, errors and rejected calls.
+    """
+    return {name: guard.stats() for name, guard in get_guards().items()}
+
+
 # Health check endpoint for admin service
 @router.get(
     "/health",
@@ -14,7 +14,8 @@ from admin.database import (
     get_user_forecasting_metrics, get_user_health_metrics,
     get_user_recommendation_metrics, calculate_engagement_score,
     assess_risk_level, check_needs_attention, get_time_filter_query,
-    log_activity, get_bulk_farmer_metrics, ensure_indexes
+    log_activity, get_bulk_farmer_metrics, get_system_totals, count_farmers_needing_attention,
+    METRICS_BATCH_SIZE, ensure_indexes
 )
 
 logger = logging.getLogger(__name__)
@@ -254,128 +255,106 @@ def get_farmers_list(filters: DashboardFilters) -> Tuple[List[FarmerDashboardDat
         return [], 0
 
 
-def get_dashboard_summary(time_filter: TimeFilter = TimeFilter.all) -> DashboardSummary:
-    """Get overall system summary for admin dashboard - OPTIMIZED VERSION"""
-    try:
-        # Get user counts using aggregation - exclude admin users
-        base_match = {"$or": [{"is_admin": False}, {"is_admin": {"$exists": False}}]}
-        
-        pipeline = [
-            {"$match": base_match},
-            {"$facet": {
-                "total": [{"$count": "count"}],
-                "active": [{"$match": {"is_active": True}}, {"$count": "count"}],
-                "by_location": [{"$group": {"_id": "$location", "count": {"$sum": 1}}}],
-                "user_ids": [{"$project": {"_id": {"$toString": "$_id"}}}]
-            }}
-        ]
-        
-        facet_result = list(users_collection.aggregate(pipeline))[0]
-        
-        total_farmers = facet_result["total"][0]["count"] if facet_result["total"] else 0
-        active_farmers = facet_result["active"][0]["count"] if facet_result["active"] else 0
-        inactive_farmers = total_farmers - active_farmers
-        
-        # Regional distribution
-        regional_distribution = {
-            doc["_id"]: doc["count"] 
-            for doc in facet_result["by_location"] 
-            if doc["_id"]
-        }
-        
-        # Get all user IDs
-        user_ids = [doc["_id"] for doc in facet_result["user_ids"]]
-        
-        if not user_ids:
-            return DashboardSummary(
-                total_farmers=0,
-                time_filter=time_filter
-            )
-        
-        # Process in batches for very large datasets
-        batch_size = 100
-        farmers_needing_attention = 0
-        total_revenue = 0.0
-        total_expenses = 0.0
-        total_profit = 0.0
-        
-        # Service usage counters
-        auth_logins = 0
-        expense_entries = 0
-        predictions_made = 0
-        health_assessments = 0
-        recommendations_given = 0
-        
-        for i in range(0, len(user_ids), batch_size):
-            batch_ids = user_ids[i:i + batch_size]
-            batch_metrics = get_bulk_farmer_metrics(tuple(batch_ids), time_filter)
-            
-            for user_id, metrics in batch_metrics.items():
-                # Aggregate financial data
-                expense_metrics = metrics.get("expense_metrics", {})
-                total_revenue += expense_metrics.get("total_revenue", 0)
-                total_expenses += expense_metrics.get("total_expenses", 0)
-                total_profit += expense_metrics.get("total_profit", 0)
-                
-                # Count service usage
-                auth_logins += metrics.get("auth_metrics", {}).get("total_logins", 0)
-                expense_entries += expense_metrics.get("expense_count", 0)
-                predictions_made += metrics.get("forecasting_metrics", {}).get("total_predictions", 0)
-                health_assessments += metrics.get("health_metrics", {}).get("total_assessments", 0)
-                rec_metrics = metrics.get("recommendation_metrics", {})
-                recommendations_given += (rec_metrics.get("loan_advice_count", 0) + 
-                                        rec_metrics.get("cost_cutting_count", 0))
-                
-                # Check if needs attention
-                engagement_score = calculate_engagement_score(metrics)
-                risk_level = assess_risk_level(metrics)
-                
-                if check_needs_attention({**metrics, "engagement_score": engagement_score, "risk_level": risk_level}):
-                    farmers_needing_attention += 1
-        
-        # Prepare service usage summary
-        auth_usage = {
-            "total_logins": auth_logins,
-            "avg_logins_per_user": auth_logins / total_farmers if total_farmers > 0 else 0
-        }
-        
-        expense_tracking_usage = {
-            "total_entries": expense_entries,
-            "avg_entries_per_user": expense_entries / total_farmers if total_farmers > 0 else 0
-        }
-        
-        forecasting_usage = {
-            "total_predictions": predictions_made,
-            "avg_predictions_per_user": predictions_made / total_farmers if total_farmers > 0 else 0
-        }
-        
-        health_assessment_usage = {
-            "total_assessments": health_assessments,
-            "avg_assessments_per_user": health_assessments / total_farmers if total_farmers > 0 else 0
-        }
-        
-        recommendation_usage = {
-            "total_recommendations": recommendations_given,
-            "avg_recommendations_per_user": recommendations_given / total_farmers if total_farmers > 0 else 0
-        }
-        
+def compute_dashboard_summary(time_filter: TimeFilter = TimeFilter.all) -> DashboardSummary:
+    """Compute the overall system summary for the admin dashboard (errors are raised)"""
+    # Get user counts using aggregation - exclude admin users
+    base_match = {"$or": [{"is_admin": False}, {"is_admin": {"$exists": False}}]}
+    
+    pipeline = [
+        {"$match": base_match},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "active": [{"$match": {"is_active": True}}, {"$count": "count"}],
+            "by_location": [{"$group": {"_id": "$location", "count": {"$sum": 1}}}]
+        }}
+    ]
+    
+    facet_result = list(users_collection.aggregate(pipeline))[0]
+    
+    total_farmers = facet_result["total"][0]["count"] if facet_result["total"] else 0
+    active_farmers = facet_result["active"][0]["count"] if facet_result["active"] else 0
+    inactive_farmers = total_farmers - active_farmers
+    
+    # Regional distribution
+    regional_distribution = {
+        doc["_id"]: doc["count"] 
+        for doc in facet_result["by_location"] 
+        if doc["_id"]
+    }
+    
+    if not total_farmers:
         return DashboardSummary(
-            total_farmers=total_farmers,
-            active_farmers=active_farmers,
-            inactive_farmers=inactive_farmers,
-            farmers_needing_attention=farmers_needing_attention,
-            auth_usage=auth_usage,
-            expense_tracking_usage=expense_tracking_usage,
-            forecasting_usage=forecasting_usage,
-            health_assessment_usage=health_assessment_usage,
-            recommendation_usage=recommendation_usage,
-            total_system_revenue=total_revenue,
-            total_system_expenses=total_expenses,
-            total_system_profit=total_profit,
-            regional_distribution=regional_distribution,
+            total_farmers=0,
             time_filter=time_filter
         )
-        
+    
+    # System totals are computed server-side over the same (non-admin) users
+    totals = get_system_totals(time_filter)
+    total_revenue = totals["total_revenue"]
+    total_expenses = totals["total_expenses"]
+    total_profit = totals["total_profit"]
+    auth_logins = totals["auth_logins"]
+    expense_entries = totals["expense_entries"]
+    predictions_made = totals["predictions_made"]
+    health_assessments = totals["health_assessments"]
+    recommendations_given = totals["recommendations_given"]
+    
+    # Needs-attention is judged per farmer: stream ids from a cursor in batches
+    farmer_ids = (
+        str(doc["_id"])
+        for doc in users_collection.find(base_match, {"_id": 1}).batch_size(METRICS_BATCH_SIZE)
+    )
+    farmers_needing_attention = count_farmers_needing_attention(farmer_ids, time_filter)
+    
+    # Prepare service usage summary
+    auth_usage = {
+        "total_logins": auth_logins,
+        "avg_logins_per_user": auth_logins / total_farmers if total_farmers > 0 else 0
+    }
+    
+    expense_tracking_usage = {
+        "total_entries": expense_entries,
+        "avg_entries_per_user": expense_entries / total_farmers if total_farmers > 0 else 0
+    }
+    
+    forecasting_usage = {
+        "total_predictions": predictions_made,
+        "avg_predictions_per_user": predictions_made / total_farmers if total_farmers > 0 else 0
+    }
+    
+    health_assessment_usage = {
+        "total_assessments": health_assessments,
+        "avg_assessments_per_user": health_assessments / total_farmers if total_farmers > 0 else 0
+    }
+    
+    recommendation_usage = {
+        "total_recommendations": recommendations_given,
+        "avg_recommendations_per_user": recommendations_given / total_farmers if total_farmers > 0 else 0
+    }
+    
+    return DashboardSummary(
+        total_farmers=total_farmers,
+        active_farmers=active_farmers,
+        inactive_farmers=inactive_farmers,
+        farmers_needing_attention=farmers_needing_attention,
+        auth_usage=auth_usage,
+        expense_tracking_usage=expense_tracking_usage,
+        forecasting_usage=forecasting_usage,
+        health_assessment_usage=health_assessment_usage,
+        recommendation_usage=recommendation_usage,
+        total_system_revenue=total_revenue,
+        total_system_expenses=total_expenses,
+        total_system_profit=total_profit,
+        regional_distribution=regional_distribution,
+        time_filter=time_filter
+    )
+    
+
+
+def get_dashboard_summary(time_filter: TimeFilter = TimeFilter.all) -> DashboardSummary:
+    """Get overall system summary for admin dashboard - OPTIMIZED VERSION"""
+    try:
+        return compute_dashboard_summary(time_filter)
     except Exception as e:
         logger.error("Error getting dashboard summary: %s", str(e))
         return DashboardSummary()
@@ -0,0 +1,176 @@
+"""
+Background-refreshed admin dashboard summaries.
+
+A scheduler thread recomputes the dashboard summary for every TimeFilter
+each ADMIN_SNAPSHOT_INTERVAL_SECONDS and stores it as a new version in the
+dashboard_snapshots collection (the last ADMIN_SNAPSHOT_KEEP versions per
+filter are kept). The summary endpoint serves the latest snapshot from
+memory; ``refresh`` recomputes on demand.
+
+With several workers, each scheduled refresh first takes a lease on the
+time filter in the dashboard_snapshot_leases collection. The lease lasts
+one interval, so a single worker recomputes each filter per interval and
+the others load the snapshot it stored.
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+import config
+from admin.database import db
+from admin.models import DashboardSummary, TimeFilter
+from admin.services import compute_dashboard_summary
+
+logger = logging.getLogger(__name__)
+
+snapshots_collection = db.dashboard_snapshots
+leases_collection = db.dashboard_snapshot_leases
+
+
+class DashboardSnapshots:
+    def __init__(self, collection, leases=None, interval_seconds: int = 300, keep: int = 24):
+        self.collection = collection
+        self.leases = leases
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.interval = timedelta(seconds=interval_seconds)
+        self.keep = keep
+        self._latest: Dict[TimeFilter, DashboardSummary] = {}
+        self._refresh_locks = {time_filter: threading.Lock() for time_filter in TimeFilter}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    # --- Serving ---
+
+    def latest(self, time_filter: TimeFilter) -> DashboardSummary:
+        """The newest snapshot for ``time_filter``, computed now if there is none yet."""
+        summary = self._latest.get(time_filter) or self._load(time_filter)
+        if summary is None:
+            summary = self.refresh(time_filter)
+        return summary
+
+    def refresh(self, time_filter: TimeFilter, raise_errors: bool = False) -> DashboardSummary:
+        """
+        Recompute the summary for ``time_filter`` and store it as a new version.
+        If the computation fails the previous snapshot stays in place and is
+        returned, unless ``raise_errors`` is set (an explicit fresh request).
+        """
+        with self._refresh_locks[time_filter]:
+            try:
+                summary = compute_dashboard_summary(time_filter)
+            except Exception:
+                logger.exception("Dashboard snapshot refresh for %s failed", time_filter.value)
+                if raise_errors:
+                    raise
+                return self._latest.get(time_filter) or DashboardSummary(time_filter=time_filter)
+            summary.computed_at = datetime.utcnow()
+            summary.snapshot_version = self._store(time_filter, summary)
+            self._latest[time_filter] = summary
+            return summary
+
+    def refresh_if_due(self, time_filter: TimeFilter) -> Optional[DashboardSummary]:
+        """Recompute if this worker gets the lease for ``time_filter``, otherwise load the stored snapshot."""
+        if self._take_lease(time_filter):
+            return self.refresh(time_filter)
+        return self._load(time_filter)
+
+    def _take_lease(self, time_filter: TimeFilter) -> bool:
+        """Claim the refresh of ``time_filter`` for one interval; False if another worker holds it."""
+        if self.leases is None:
+            return True
+        now = datetime.utcnow()
+        try:
+            # An unexpired lease does not match, so the upsert fails on the duplicate _id
+            self.leases.update_one(
+                {"_id": time_filter.value, "expires_at": {"$lte": now}},
+                {"$set": {"owner": self.owner, "expires_at": now + self.interval}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+        except PyMongoError as e:
+            logger.warning("Dashboard snapshot lease failed: %s", e)
+            return False
+
+    # --- Storage ---
+
+    def _load(self, time_filter: TimeFilter) -> Optional[DashboardSummary]:
+        try:
+            doc = self.collection.find_one({"time_filter": time_filter.value}, sort=[("version", DESCENDING)])
+        except PyMongoError as e:
+            logger.warning("Dashboard snapshot load failed: %s", e)
+            return None
+        if doc is None:
+            return None
+        summary = DashboardSummary.model_validate(doc["summary"])
+        summary.computed_at = doc["computed_at"]
+        summary.snapshot_version = doc["version"]
+        self._latest[time_filter] = summary
+        return summary
+
+    def _store(self, time_filter: TimeFilter, summary: DashboardSummary) -> Optional[int]:
+        """Insert the snapshot with the next version; returns the version (None if not stored)."""
+        try:
+            newest = self.collection.find_one({"time_filter": time_filter.value}, {"version": 1}, sort=[("version", DESCENDING)])
+            version = (newest["version"] if newest else 0) + 1
+            self.collection.insert_one({
+                "time_filter": time_filter.value,
+                "version": version,
+                "computed_at": summary.computed_at,
+                "summary": summary.model_dump(mode="json", exclude={"computed_at", "snapshot_version"}),
+            })
+            self.collection.delete_many({"time_filter": time_filter.value, "version": {"$lte": version - self.keep}})
+            return version
+        except DuplicateKeyError:
+            # Another worker stored this version first; ours is served from memory only
+            return None
+        except PyMongoError as e:
+            logger.warning("Dashboard snapshot store failed: %s", e)
+            return None
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("time_filter", ASCENDING), ("version", DESCENDING)], unique=True)
+
+    # --- Scheduler ---
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="dashboard-snapshots", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.ensure_indexes()
+        except PyMongoError as e:
+            logger.warning("Dashboard snapshot index creation failed: %s", e)
+        while not self._stopped.is_set():
+            for time_filter in TimeFilter:
+                if self._stopped.is_set():
+                    break
+                self.refresh_if_due(time_filter)
+            self._stopped.wait(self.interval.total_seconds())
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+@lru_cache(maxsize=1)
+def get_dashboard_snapshots() -> DashboardSnapshots:
+    """Process-wide dashboard snapshot store and scheduler."""
+    return DashboardSnapshots(
+        snapshots_collection,
+        leases=leases_collection,
+        interval_seconds=config.ADMIN_SNAPSHOT_INTERVAL_SECONDS,
+        keep=config.ADMIN_SNAPSHOT_KEEP,
+    )
@@ -0,0 +1,191 @@
+"""
+Semantic answer cache for frequently asked chatbot questions.
+
+Questions are compared in English (after translation) using word unigram
+and bigram vectors from a stateless HashingVectorizer, so no vocabulary has
+to be fitted and new entries can be added at any time. A lookup whose cosine
+similarity to a stored question reaches the threshold returns the stored
+answer without calling the LLM, but only if both questions carry the same
+negation and number words: "when to plant" never answers "when not to
+plant", nor "2 quintals" "20 quintals". Entries expire after a TTL and the least
+recently used entry is evicted when the cache is full.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional
+
+import config
+from translation import normalize_text
+
+
+_WORD = re.compile(r"\w+")
+
+# Words that flip or quantify a question; they must match exactly for a hit
+NEGATION_WORDS = frozenset({
+    "no", "not", "never", "none", "nor", "neither", "nothing", "without",
+    "cannot", "cant", "dont", "doesnt", "didnt", "isnt", "arent", "wasnt",
+    "werent", "wont", "wouldnt", "shouldnt", "couldnt", "mustnt",
+})
+NUMBER_WORDS = frozenset({
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight",
+    "nine", "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen",
+    "sixteen", "seventeen", "eighteen", "nineteen", "twenty", "thirty",
+    "forty", "fifty", "sixty", "seventy", "eighty", "ninety", "hundred",
+    "thousand", "million", "half", "double", "twice", "first", "second",
+    "third", "once",
+})
+
+
+def question_words(question: str):
+    """Lower-case words of the question, with apostrophes dropped ("don't" -> "dont")."""
+    return _WORD.findall(normalize_text(question).replace("'", "").replace("\u2019", ""))
+
+
+def guard_words(question: str) -> FrozenSet[str]:
+    """Negation words, number words and numerals of the question."""
+    return frozenset(
+        word for word in question_words(question)
+        if word in NEGATION_WORDS or word in NUMBER_WORDS or any(ch.isdigit() for ch in word)
+    )
+
+
+class CachedAnswer:
+    __slots__ = ("question", "answer", "vector", "guard", "created_at", "hits")
+
+    def __init__(self, question: str, answer: str, vector):
+        self.question = question
+        self.answer = answer
+        self.vector = vector
+        self.guard = guard_words(question)
+        self.created_at = time.time()
+        self.hits = 0
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold: float = 0.85, max_entries: int = 5000, ttl_seconds: int = 7 * 24 * 3600):
+        # Imported here so importing the chatbot does not pay for scikit-learn
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vectorizer = HashingVectorizer(
+            analyzer=self._word_ngrams,
+            n_features=2 ** 18,
+            alternate_sign=False,
+            norm="l2",
+        )
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._matrix = None
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def _word_ngrams(question: str):
+        words = question_words(question)
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _vectorize(self, question: str):
+        return self._vectorizer.transform([question])
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._counters["expired"] += len(expired)
+            self._matrix = None
+
+    def _index(self):
+        """Stacked vectors of all entries, rebuilt only after the cache changed."""
+        if self._matrix is None and self._entries:
+            from scipy.sparse import vstack
+            self._matrix_keys = list(self._entries.keys())
+            self._matrix = vstack([self._entries[key].vector for key in self._matrix_keys]).tocsr()
+        return self._matrix
+
+    def lookup(self, question: str, threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return the best stored answer at or above the threshold, if any."""
+        threshold = self.threshold if threshold is None else threshold
+        vector = self._vectorize(question)
+        with self._lock:
+            self._expire(time.time())
+            matrix = self._index()
+            if matrix is None:
+                self._counters["misses"] += 1
+                return None
+
+            scores = (matrix @ vector.T).toarray().ravel()
+            guard = guard_words(question)
+            # Best candidate at or above the threshold whose negations and numbers agree
+            entry = key = None
+            above = (scores >= threshold).nonzero()[0]
+            for index in above[scores[above].argsort()[::-1]]:
+                score = float(scores[index])
+                candidate = self._entries[self._matrix_keys[index]]
+                if candidate.guard == guard:
+                    key, entry = self._matrix_keys[index], candidate
+                    break
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return {"question": entry.question, "answer": entry.answer, "score": score}
+
+    def store(self, question: str, answer: str) -> None:
+        if not answer:
+            return
+        key = normalize_text(question)
+        vector = self._vectorize(question)
+        with self._lock:
+            is_new = key not in self._entries
+            self._entries[key] = CachedAnswer(question, answer, vector)
+            self._entries.move_to_end(key)
+            self._counters["stores"] += 1
+
+            evicted = False
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+                evicted = True
+
+            if evicted:
+                self._matrix = None
+            elif is_new and self._matrix is not None:
+                # Append the new row instead of rebuilding the whole index
+                from scipy.sparse import vstack
+                self._matrix = vstack([self._matrix, vector]).tocsr()
+                self._matrix_keys.append(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Process-wide answer cache, or None when disabled."""
+    if not config.ANSWER_CACHE_ENABLED:
+        return None
+    return SemanticAnswerCache(
+        threshold=config.ANSWER_CACHE_THRESHOLD,
+        max_entries=config.ANSWER_CACHE_SIZE,
+        ttl_seconds=config.ANSWER_CACHE_TTL_HOURS * 3600,
+    )
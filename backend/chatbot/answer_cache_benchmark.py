@@ -0,0 +1,67 @@
+"""
+Offline hit-rate benchmark for the chatbot answer cache.
+
+Replays a recorded question log through SemanticAnswerCache in order: every
+question is looked up, and misses are stored as if the LLM had answered
+them. Reports the hit rate for each threshold plus sample matches so false
+positives can be checked by eye before changing ANSWER_CACHE_THRESHOLD.
+
+The log is either plain text (one English question per line) or JSONL with
+the question in a "message" (or "question") field.
+
+Usage (from the backend directory):
+    python -m chatbot.answer_cache_benchmark questions.jsonl
+    python -m chatbot.answer_cache_benchmark questions.txt --thresholds 0.75,0.85,0.95 --samples 10
+"""
+
+import argparse
+import json
+from typing import Dict, List
+
+from .answer_cache import SemanticAnswerCache
+
+
+def load_questions(path: str) -> List[str]:
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                line = record.get("message") or record.get("question") or ""
+            if line:
+                questions.append(line)
+    return questions
+
+
+def replay(questions: List[str], threshold: float, max_entries: int) -> Dict[str, object]:
+    cache = SemanticAnswerCache(threshold=threshold, max_entries=max_entries)
+    matches = []
+    for question in questions:
+        hit = cache.lookup(question)
+        if hit:
+            matches.append((question, hit["question"], hit["score"]))
+        else:
+            cache.store(question, f"answer to: {question}")
+    return {"stats": cache.stats(), "matches": matches}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure answer cache hit rate on a recorded question log")
+    parser.add_argument("log", help="Question log (.txt one per line, or .jsonl)")
+    parser.add_argument("--thresholds", default="0.75,0.8,0.85,0.9,0.95", help="Comma-separated similarity thresholds")
+    parser.add_argument("--max-entries", type=int, default=5000, help="Cache size (default: 5000)")
+    parser.add_argument("--samples", type=int, default=5, help="Matches to print per threshold")
+    args = parser.parse_args()
+
+    questions = load_questions(args.log)
+    print(f"{len(questions)} questions")
+
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        result = replay(questions, threshold, args.max_entries)
+        stats = result["stats"]
+        print(f"\nthreshold={threshold:.2f} hit_rate={stats['hit_rate']:.1%} hits={stats['hits']} entries={stats['entries']}")
+        for question, matched, score in result["matches"][:args.samples]:
+            print(f"  {score:.2f}  {question!r} -> {matched!r}")
@@ -0,0 +1,210 @@
+"""
+Concurrency caps, timeouts and circuit breakers for the chatbot's external
+dependencies (Gemini and Google Translate).
+
+Each dependency gets a DependencyGuard: at most ``max_concurrency`` calls
+run at once, callers wait at most ``queue_timeout`` for a slot, and every
+call is bounded by ``timeout``. Consecutive failures open the circuit so
+calls fail fast for ``reset_timeout`` seconds; after that one probe call is
+let through (half-open) and closes the circuit again if it succeeds.
+Only the probe's outcome decides the half-open state: calls admitted before
+the circuit opened do not count once they finish.
+A slow or failing upstream therefore cannot tie up the API server's
+workers and connections for every other route.
+"""
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, NamedTuple, Optional
+
+import config
+
+
+class DependencyUnavailable(Exception):
+    """The dependency is failing, saturated or its circuit is open."""
+
+
+class Admission(NamedTuple):
+    """A call let through by the breaker: the circuit generation it belongs to and whether it is the probe."""
+    generation: int
+    probe: bool = False
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        # Bumped every time the circuit opens; outcomes of calls admitted
+        # under an earlier generation are ignored
+        self.generation = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> Optional[Admission]:
+        """Admit a call now, or None if the circuit rejects it."""
+        if self.state == self.CLOSED:
+            return Admission(self.generation)
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return Admission(self.generation, probe=True)
+        return None
+
+    def _counts(self, admission: Admission) -> bool:
+        if admission.generation != self.generation:
+            return False
+        # While half-open only the probe may change the state
+        return self.state == self.CLOSED or admission.probe
+
+    def release_probe(self, admission: Admission) -> None:
+        """Let another probe through if this call was the probe and ended without a verdict."""
+        if admission.probe and admission.generation == self.generation:
+            self._probe_in_flight = False
+
+    def record_success(self, admission: Admission) -> None:
+        if not self._counts(admission):
+            return
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, admission: Admission) -> None:
+        if not self._counts(admission):
+            return
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.generation += 1
+
+
+class DependencyGuard:
+    def __init__(self, name: str, max_concurrency: int, timeout: float, queue_timeout: float, breaker: CircuitBreaker):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker
+        self.in_flight = 0
+        self._semaphore = None
+        self._counters = {"calls": 0, "timeouts": 0, "errors": 0, "rejected": 0}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _acquire(self) -> Admission:
+        admission = self.breaker.allow()
+        if admission is None:
+            self._counters["rejected"] += 1
+            raise DependencyUnavailable(f"{self.name} circuit is open")
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._counters["rejected"] += 1
+            # Saturation is not the upstream's fault
+            self.breaker.release_probe(admission)
+            raise DependencyUnavailable(f"{self.name} is at capacity")
+        self.in_flight += 1
+        self._counters["calls"] += 1
+        return admission
+
+    def _release(self, admission: Admission) -> None:
+        self.in_flight -= 1
+        self.semaphore.release()
+        # Cancelled calls and abandoned streams neither succeed nor fail
+        self.breaker.release_probe(admission)
+
+    def _failed(self, admission: Admission, error: Exception) -> DependencyUnavailable:
+        self.breaker.record_failure(admission)
+        if isinstance(error, asyncio.TimeoutError):
+            self._counters["timeouts"] += 1
+            return DependencyUnavailable(f"{self.name} timed out after {self.timeout}s")
+        self._counters["errors"] += 1
+        return DependencyUnavailable(f"{self.name} failed: {error}")
+
+    async def call(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``factory()`` under the concurrency cap, timeout and breaker.
+
+        A timed-out call is not cancelled underneath (work handed to a
+        thread pool cannot be stopped anyway); its slot is only released
+        once it really finishes, so the cap bounds the work in progress.
+        """
+        admission = await self._acquire()
+        try:
+            task = asyncio.ensure_future(factory())
+        except Exception as e:
+            self._release(admission)
+            raise self._failed(admission, e) from e
+        task.add_done_callback(lambda done: self._finished(admission, done))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except Exception as e:
+            raise self._failed(admission, e) from e
+        self.breaker.record_success(admission)
+        return result
+
+    def _finished(self, admission: Admission, task: asyncio.Future) -> None:
+        self._release(admission)
+        # Mark a late failure as retrieved; it was already reported as a timeout
+        if not task.cancelled():
+            task.exception()
+
+    async def stream(self, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Guard a streaming call; ``timeout`` bounds the wait for each item."""
+        admission = await self._acquire()
+        try:
+            iterator = factory().__aiter__()
+            while True:
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    raise self._failed(admission, e) from e
+                yield item
+        finally:
+            self._release(admission)
+        self.breaker.record_success(admission)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+        }
+
+
+def _guard(name: str, max_concurrency: int, timeout: float) -> DependencyGuard:
+    return DependencyGuard(
+        name,
+        max_concurrency=max_concurrency,
+        timeout=timeout,
+        queue_timeout=config.CHAT_QUEUE_TIMEOUT_SECONDS,
+        breaker=CircuitBreaker(config.CHAT_BREAKER_FAILURES, config.CHAT_BREAKER_RESET_SECONDS),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_guards() -> Dict[str, DependencyGuard]:
+    """Process-wide guards, one per external dependency."""
+    return {
+        "llm": _guard("llm", config.CHAT_LLM_MAX_CONCURRENCY, config.CHAT_LLM_TIMEOUT_SECONDS),
+        "translate": _guard("translate", config.CHAT_TRANSLATE_MAX_CONCURRENCY, config.CHAT_TRANSLATE_TIMEOUT_SECONDS),
+    }
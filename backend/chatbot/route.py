@@ -1,16 +1,56 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from .service import ChatService
+from typing import Optional
+import config
+from auth.dependencies import get_current_active_user
+from .resilience import DependencyUnavailable
+from .service import ChatService, get_chat_service
+from .session import session_key
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
     message: str
     language: str = "en"
+    # Optional conversation label, scoped to the signed-in user; omit it for
+    # a stateless single turn
+    session_id: Optional[str] = None
 
 @router.post("/chatbot")
 async def chat_endpoint(
     req: ChatRequest,
-    svc: ChatService = Depends(ChatService) 
+    current_user: dict = Depends(get_current_active_user),
+    svc: ChatService = Depends(get_chat_service)
 ):
-    return await svc.generate(req.message, req.language)
+    try:
+        return await svc.generate(req.message, req.language, session_key(current_user["_id"], req.session_id))
+    except DependencyUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Chatbot is temporarily unavailable: {e}",
+            headers={"Retry-After": str(int(config.CHAT_BREAKER_RESET_SECONDS))},
+        )
+
+
+@router.post("/chatbot/stream")
+async def chat_stream_endpoint(
+    req: ChatRequest,
+    current_user: dict = Depends(get_current_active_user),
+    svc: ChatService = Depends(get_chat_service)
+):
+    """
+    Stream the chatbot answer over Server-Sent Events.
+
+    Events: ``token`` (English, as generated), ``chunk`` (translated
+    sentence for other languages), ``error`` and a final ``done``.
+    """
+    return StreamingResponse(
+        svc.stream(req.message, req.language, session_key(current_user["_id"], req.session_id)),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so events reach the client immediately
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -1,33 +1,273 @@
+import asyncio
+import json
 import os
+import re
 import time
-from deep_translator import GoogleTranslator
-import google.generativeai as genai
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Tuple
+from translation import get_translator
+from .answer_cache import get_answer_cache
+from .resilience import DependencyUnavailable, get_guards
+from .session import ChatSession, get_session_store
+import config
+
+PROMPT_TEMPLATE = (
+    "You are a helpful and concise agricultural chatbot. "
+    "Respond briefly, like Deepseek. Be friendly and avoid long intros. "
+    "For አማርኛ and ትግርኛ answer like Deepseek. "
+    "Only give detailed farming advice if the question needs it.\n\n"
+    "{history}"
+    "User: {message}\nAssistant:"
+)
+
+# End of an English sentence (or line) in the streamed model output
+SENTENCE_END = re.compile(r"(?<=[.!?:;])\s+|\n+")
+
+
+def split_sentences(buffer: str) -> Tuple[List[str], str]:
+    """Split ``buffer`` into complete sentences and the unfinished remainder."""
+    parts = SENTENCE_END.split(buffer)
+    complete = [part.strip() for part in parts[:-1] if part.strip()]
+    return complete, parts[-1]
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@lru_cache(maxsize=1)
+def configure_genai():
+    """Import and configure the Gemini client once, on first use."""
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai
+
+
+class GeminiBackend:
+    """Gemini text generation through the client's async API."""
 
-class ChatService:
     def __init__(self, model_name: str = "gemini-2.0-flash"):
+        genai = configure_genai()
+        # One model object per process so the underlying client and its
+        # connections are reused across requests
         self.model = genai.GenerativeModel(model_name=model_name)
 
-    def translate(self, text: str, src: str, tgt: str) -> str:
-        return GoogleTranslator(source=src, target=tgt).translate(text)
+    async def generate(self, prompt: str) -> str:
+        resp = await self.model.generate_content_async(prompt)
+        return getattr(resp, "text", "").strip()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        resp = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in resp:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+
+class StubBackend:
+    """Offline backend for tests and local development; never calls the network."""
+
+    async def generate(self, prompt: str) -> str:
+        message = prompt.rsplit("User: ", 1)[-1].rsplit("\nAssistant:", 1)[0]
+        return f"[stub] {message}"
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        for word in (await self.generate(prompt)).split(" "):
+            yield word + " "
+
+
+class StubTranslator:
+    """Identity translator for tests."""
+
+    async def translate(self, text: str, src: str, tgt: str, guard=None) -> str:
+        return text
+
+
+class ChatService:
+    def __init__(self, backend=None, translator=None, answer_cache=None, sessions=None, guards=None):
+        self.backend = backend or GeminiBackend()
+        self.translator = translator or get_translator()
+        self.answer_cache = answer_cache if answer_cache is not None else get_answer_cache()
+        self.sessions = sessions if sessions is not None else get_session_store()
+        self.guards = guards or get_guards()
+
+    async def load_session(self, session_id: Optional[str]) -> Optional[ChatSession]:
+        if not session_id:
+            return None
+        # The shared session store is blocking I/O; keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self.sessions.get, session_id)
+
+    async def record_turn(self, session: Optional[ChatSession], en_in: str, en_out: str) -> None:
+        if session:
+            await asyncio.get_running_loop().run_in_executor(None, self.sessions.append, session, en_in, en_out)
+
+    def build_prompt(self, en_in: str, session: Optional[ChatSession]) -> str:
+        history = session.history_prompt(config.CHAT_HISTORY_TOKEN_BUDGET) if session else ""
+        return PROMPT_TEMPLATE.format(history=history, message=en_in)
+
+    def cached_answer(self, en_in: str, session: Optional[ChatSession] = None):
+        """Stored English answer for a near-duplicate question, if any."""
+        # Follow-up questions depend on the conversation, so only
+        # context-free questions are served from the cache
+        if self.answer_cache is None or (session and session.has_history):
+            return None
+        return self.answer_cache.lookup(en_in)
+
+    def fallback_answer(self, en_in: str):
+        """Closest cached answer for when the LLM is unavailable (never looser than a normal hit)."""
+        if self.answer_cache is None:
+            return None
+        threshold = max(config.CHAT_FALLBACK_THRESHOLD, self.answer_cache.threshold)
+        return self.answer_cache.lookup(en_in, threshold=threshold)
+
+    def remember_answer(self, en_in: str, en_out: str) -> None:
+        if self.answer_cache is not None:
+            self.answer_cache.store(en_in, en_out)
 
-    async def generate(self, user_message: str, lang_code: str = "am") -> dict:
+    async def translate(self, text: str, src: str, tgt: str) -> str:
+        if src == tgt or not text:
+            return text
+        return await self.translator.translate(text, src, tgt, guard=self.guards["translate"].call)
+
+    async def translate_out(self, text: str, lang_code: str) -> Tuple[str, bool]:
+        """Translate an answer back; falls back to English if the translator is down."""
+        try:
+            return await self.translate(text, "en", lang_code), False
+        except DependencyUnavailable as e:
+            print(f"Chatbot answer translation skipped: {e}")
+            return text, True
+
+    async def generate(self, user_message: str, lang_code: str = "am", session_id: Optional[str] = None) -> dict:
         start = time.time()
-        # translate user → English
-        en_in = self.translate(user_message, lang_code, "en")
-        prompt = (
-            "You are a helpful and concise agricultural chatbot. "
-            "Respond briefly, like Deepseek. Be friendly and avoid long intros. "
-            "For አማርኛ and ትግርኛ answer like Deepseek. "
-            "Only give detailed farming advice if the question needs it.\n\n"
-            f"User: {en_in}\nAssistant:"
-        )
-        resp = self.model.generate_content(prompt)
-        en_out = getattr(resp, "text", "").strip()
+        session = await self.load_session(session_id)
+        # translate user → English (skipped for English)
+        en_in = await self.translate(user_message, lang_code, "en")
+        hit = self.cached_answer(en_in, session)
+        degraded = False
+        if hit:
+            en_out = hit["answer"]
+        else:
+            prompt = self.build_prompt(en_in, session)
+            try:
+                en_out = await self.guards["llm"].call(lambda: self.backend.generate(prompt))
+            except DependencyUnavailable:
+                # Serve the closest cached answer rather than failing outright
+                hit = self.fallback_answer(en_in)
+                if not hit:
+                    raise
+                en_out = hit["answer"]
+                degraded = True
+            else:
+                if not session or not session.has_history:
+                    self.remember_answer(en_in, en_out)
+        await self.record_turn(session, en_in, en_out)
         # translate back → original
-        translated = self.translate(en_out, "en", lang_code)
+        translated, untranslated = await self.translate_out(en_out, lang_code)
         return {
             "response": translated,
             "original_response": en_out,
+            "cached": bool(hit),
+            "degraded": degraded or untranslated,
             "elapsed_ms": int((time.time() - start) * 1000),
         }
+
+    async def stream(self, user_message: str, lang_code: str = "am", session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the answer as Server-Sent Events.
+
+        English answers are forwarded token by token as the model produces
+        them. For other languages each completed sentence is translated and
+        sent as soon as it is finished, instead of waiting for the full answer.
+        A final ``done`` event carries the full English answer and timing.
+        """
+        start = time.time()
+        session = await self.load_session(session_id)
+        try:
+            en_in = await self.translate(user_message, lang_code, "en")
+        except DependencyUnavailable as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+
+        hit = self.cached_answer(en_in, session)
+        if hit:
+            async for event in self._stream_cached(en_in, hit, session, lang_code, start, degraded=False):
+                yield event
+            return
+
+        prompt = self.build_prompt(en_in, session)
+        context_free = not session or not session.has_history
+        en_out = ""
+        buffer = ""
+        first_byte_ms = None
+        degraded = False
+        try:
+            async for token in self.guards["llm"].stream(lambda: self.backend.stream(prompt)):
+                en_out += token
+                if lang_code == "en":
+                    if first_byte_ms is None:
+                        first_byte_ms = int((time.time() - start) * 1000)
+                    yield sse_event("token", {"text": token})
+                    continue
+
+                buffer += token
+                sentences, buffer = split_sentences(buffer)
+                for sentence in sentences:
+                    translated, untranslated = await self.translate_out(sentence, lang_code)
+                    degraded = degraded or untranslated
+                    if first_byte_ms is None:
+                        first_byte_ms = int((time.time() - start) * 1000)
+                    yield sse_event("chunk", {"text": translated})
+
+            if lang_code != "en" and buffer.strip():
+                translated, untranslated = await self.translate_out(buffer.strip(), lang_code)
+                degraded = degraded or untranslated
+                yield sse_event("chunk", {"text": translated})
+        except DependencyUnavailable as e:
+            # Nothing sent yet: answer from the cache instead if we can
+            hit = None if en_out else self.fallback_answer(en_in)
+            if hit:
+                async for event in self._stream_cached(en_in, hit, session, lang_code, start, degraded=True):
+                    yield event
+            else:
+                yield sse_event("error", {"detail": str(e)})
+            return
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+
+        if context_free:
+            self.remember_answer(en_in, en_out.strip())
+        await self.record_turn(session, en_in, en_out.strip())
+        yield sse_event("done", {
+            "original_response": en_out.strip(),
+            "cached": False,
+            "degraded": degraded,
+            "first_byte_ms": first_byte_ms,
+            "elapsed_ms": int((time.time() - start) * 1000),
+        })
+
+    async def _stream_cached(self, en_in: str, hit: dict, session: Optional[ChatSession], lang_code: str, start: float, degraded: bool) -> AsyncIterator[str]:
+        """Send a cached answer as a single event followed by ``done``."""
+        await self.record_turn(session, en_in, hit["answer"])
+        translated, untranslated = await self.translate_out(hit["answer"], lang_code)
+        yield sse_event("token" if lang_code == "en" else "chunk", {"text": translated})
+        yield sse_event("done", {
+            "original_response": hit["answer"],
+            "cached": True,
+            "degraded": degraded or untranslated,
+            "first_byte_ms": int((time.time() - start) * 1000),
+            "elapsed_ms": int((time.time() - start) * 1000),
+        })
+
+
+@lru_cache(maxsize=1)
+def get_chat_service() -> ChatService:
+    """
+    Process-wide chat pipeline, used as a FastAPI dependency.
+
+    Set CHAT_BACKEND=stub to run without Gemini or Google Translate.
+    """
+    if config.CHAT_BACKEND == "stub":
+        return ChatService(backend=StubBackend(), translator=StubTranslator())
+    return ChatService()
@@ -0,0 +1,226 @@
+"""
+Bounded conversation history for the chatbot.
+
+Each session keeps its most recent turns (English question and answer) in a
+ring buffer. When a turn falls out of the buffer it is compacted into a
+short running summary instead of being dropped, and prompts are assembled
+newest-first within a fixed token budget, so long conversations keep their
+context without prompts (and latency) growing without bound. Idle sessions
+expire after a TTL and the number of sessions held in memory is capped.
+
+Sessions are keyed by the authenticated user (see ``session_key``). With
+CHAT_SESSION_STORE=mongo they live in the chat_sessions collection (expired
+by a TTL index) so every worker sees the same history; otherwise they are
+kept in process memory.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def first_sentence(text: str, max_chars: int = 160) -> str:
+    text = " ".join(text.split())
+    match = _FIRST_SENTENCE.match(text)
+    sentence = match.group(1) if match else text
+    return sentence[:max_chars]
+
+
+def session_key(user_id, conversation: Optional[str]) -> Optional[str]:
+    """
+    Store key for a user's conversation; ``conversation`` only labels it
+    within that user. Requests without one stay stateless (None).
+    """
+    return f"{user_id}:{conversation}" if conversation else None
+
+
+class ChatSession:
+    def __init__(self, max_turns: int, summary_tokens: int, session_id: Optional[str] = None):
+        self.session_id = session_id
+        self.turns: Deque[Tuple[str, str]] = deque(maxlen=max_turns)
+        self.summary = ""
+        self.summary_tokens = summary_tokens
+        self.updated_at = time.time()
+        # Stored revision this copy was loaded at (shared store only)
+        self.revision = 0
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.turns or self.summary)
+
+    def add_turn(self, question: str, answer: str) -> None:
+        if len(self.turns) == self.turns.maxlen:
+            self._compact(*self.turns[0])
+        self.turns.append((question, answer))
+        self.updated_at = time.time()
+
+    def _compact(self, question: str, answer: str) -> None:
+        """Fold an old turn into the running summary, keeping it within budget."""
+        line = f"Asked: {first_sentence(question)} Answered: {first_sentence(answer)}"
+        summary = f"{self.summary}\n{line}".strip()
+        # Drop the oldest summary lines once over budget
+        lines = summary.split("\n")
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+
+    def history_prompt(self, token_budget: int) -> str:
+        """Summary plus as many recent turns as fit in ``token_budget``."""
+        parts = []
+        used = 0
+        for question, answer in reversed(self.turns):
+            turn = f"User: {question}\nAssistant: {answer}\n"
+            cost = estimate_tokens(turn)
+            if used + cost > token_budget:
+                break
+            parts.append(turn)
+            used += cost
+
+        history = "".join(reversed(parts))
+        if self.summary and used + estimate_tokens(self.summary) <= token_budget:
+            history = f"Earlier in this conversation:\n{self.summary}\n\n{history}"
+        return history
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "turns": [list(turn) for turn in self.turns],
+            "summary": self.summary,
+            "updated_at": datetime.utcfromtimestamp(self.updated_at),
+        }
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any], max_turns: int, summary_tokens: int) -> "ChatSession":
+        session = cls(max_turns, summary_tokens, session_id=doc["_id"])
+        session.turns.extend(tuple(turn) for turn in doc.get("turns", []))
+        session.summary = doc.get("summary", "")
+        session.revision = doc.get("revision", 0)
+        return session
+
+
+class SessionStore:
+    def __init__(self, max_turns: int = 6, summary_tokens: int = 200, ttl_seconds: int = 1800, max_sessions: int = 10000, collection=None):
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        # Optional shared tier (a pymongo collection); process memory when None
+        self.collection = collection
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+
+    def _expire(self, now: float) -> None:
+        # Sessions are ordered by last use, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.updated_at <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id: str) -> ChatSession:
+        """Return the live session, creating a fresh one if missing or expired."""
+        if self.collection is not None:
+            try:
+                return self._get_store(session_id)
+            except Exception as e:
+                logger.warning("Chat session load failed, using process memory: %s", e)
+        return self._get_memory(session_id)
+
+    def append(self, session: ChatSession, question: str, answer: str, attempts: int = 3) -> None:
+        """
+        Add a turn to the session and persist it. Shared sessions are written
+        only if nobody else wrote since they were loaded (compared on the
+        revision); on a conflict the session is reloaded and the turn
+        re-applied, so concurrent turns are not lost.
+        """
+        if self.collection is None:
+            with self._lock:
+                session.add_turn(question, answer)
+            return
+        try:
+            self._ensure_indexes()
+            for _ in range(attempts):
+                session.add_turn(question, answer)
+                document = {**session.to_document(), "revision": session.revision + 1}
+                try:
+                    # A newer revision makes the upsert insert a duplicate _id
+                    self.collection.update_one(
+                        {"_id": session.session_id, "revision": session.revision},
+                        {"$set": document},
+                        upsert=True,
+                    )
+                    session.revision += 1
+                    return
+                except DuplicateKeyError:
+                    session = self._get_store(session.session_id)
+            logger.warning("Chat session %s kept changing, turn not saved", session.session_id)
+        except Exception as e:
+            logger.warning("Chat session write failed: %s", e)
+
+    def _get_store(self, session_id: str) -> ChatSession:
+        doc = self.collection.find_one({"_id": session_id})
+        if doc is None:
+            return ChatSession(self.max_turns, self.summary_tokens, session_id=session_id)
+        # The TTL monitor only runs once a minute, so check the age here as well
+        if (datetime.utcnow() - doc["updated_at"]).total_seconds() > self.ttl_seconds:
+            session = ChatSession(self.max_turns, self.summary_tokens, session_id=session_id)
+            # Start over, but overwrite the expired document
+            session.revision = doc.get("revision", 0)
+            return session
+        return ChatSession.from_document(doc, self.max_turns, self.summary_tokens)
+
+    def _ensure_indexes(self) -> None:
+        if self._indexes_ready:
+            return
+        self.collection.create_index([("updated_at", ASCENDING)], expireAfterSeconds=self.ttl_seconds)
+        self._indexes_ready = True
+
+    def _get_memory(self, session_id: str) -> ChatSession:
+        with self._lock:
+            self._expire(time.time())
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSession(self.max_turns, self.summary_tokens, session_id=session_id)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            session.updated_at = time.time()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+    collection = None
+    if config.CHAT_SESSION_STORE == "mongo":
+        from auth.database import db
+        collection = db.chat_sessions
+    return SessionStore(
+        max_turns=config.CHAT_SESSION_MAX_TURNS,
+        summary_tokens=config.CHAT_SESSION_SUMMARY_TOKENS,
+        ttl_seconds=config.CHAT_SESSION_TTL_MINUTES * 60,
+        max_sessions=config.CHAT_SESSION_MAX_SESSIONS,
+        collection=collection,
+    )
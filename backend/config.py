@@ -41,6 +41,94 @@ CORS_ALLOW_HEADERS = os.getenv("CORS_ALLOW_HEADERS", "*").split(",")
 # Set to True in production when ready to implement HTTPS
 ENFORCE_HTTPS = False  # Hardcoded to False to explicitly disable it
 
+# Model artifacts (CatBoost forecasting models, recommendation model and encoders)
+MODEL_DIR = os.getenv("MODEL_DIR", str(Path(__file__).resolve().parent.parent / "model"))
+
+# How often (seconds) each worker checks MODEL_DIR/CURRENT for a new model version
+MODEL_VERSION_CHECK_SECONDS = int(os.getenv("MODEL_VERSION_CHECK_SECONDS", "30"))
+
+# Load models and external clients on application startup instead of on first use.
+# Disable in tests/CI so runs do not pay for models they never touch.
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "True").lower() in ('true', '1', 't')
+
+# Server workers (used by gunicorn.conf.py)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# Chatbot backend: "gemini" (default) or "stub" for tests and offline development
+CHAT_BACKEND = os.getenv("CHAT_BACKEND", "gemini").lower()
+
+# Translation cache: in-process LRU size, shared store ("mongo" or "none") and entry lifetime
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "10000"))
+TRANSLATION_CACHE_STORE = os.getenv("TRANSLATION_CACHE_STORE", "mongo").lower()
+TRANSLATION_CACHE_TTL_DAYS = int(os.getenv("TRANSLATION_CACHE_TTL_DAYS", "30"))
+
+# Chatbot answer cache for near-duplicate questions (cosine similarity threshold 0-1)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() in ('true', '1', 't')
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "5000"))
+ANSWER_CACHE_TTL_HOURS = int(os.getenv("ANSWER_CACHE_TTL_HOURS", "168"))
+
+# Chatbot conversation sessions: recent turns kept verbatim, token budgets for the
+# prompt history and the compacted summary of older turns, idle TTL, in-memory session
+# cap and where sessions live ("mongo" to share them across workers, or "memory")
+CHAT_SESSION_MAX_TURNS = int(os.getenv("CHAT_SESSION_MAX_TURNS", "6"))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1000"))
+CHAT_SESSION_SUMMARY_TOKENS = int(os.getenv("CHAT_SESSION_SUMMARY_TOKENS", "200"))
+CHAT_SESSION_TTL_MINUTES = int(os.getenv("CHAT_SESSION_TTL_MINUTES", "30"))
+CHAT_SESSION_MAX_SESSIONS = int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "10000"))
+CHAT_SESSION_STORE = os.getenv("CHAT_SESSION_STORE", "mongo").lower()
+
+# Chatbot upstream limits: concurrent calls and timeouts per dependency, how long a
+# request may wait for a free slot, and the circuit breaker threshold/cool-down.
+# When the LLM is unavailable, answers to similar questions above the fallback
+# threshold are served from the answer cache (never below ANSWER_CACHE_THRESHOLD).
+CHAT_LLM_MAX_CONCURRENCY = int(os.getenv("CHAT_LLM_MAX_CONCURRENCY", "16"))
+CHAT_LLM_TIMEOUT_SECONDS = float(os.getenv("CHAT_LLM_TIMEOUT_SECONDS", "20"))
+CHAT_TRANSLATE_MAX_CONCURRENCY = int(os.getenv("CHAT_TRANSLATE_MAX_CONCURRENCY", "8"))
+CHAT_TRANSLATE_TIMEOUT_SECONDS = float(os.getenv("CHAT_TRANSLATE_TIMEOUT_SECONDS", "5"))
+CHAT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "2"))
+CHAT_BREAKER_FAILURES = int(os.getenv("CHAT_BREAKER_FAILURES", "5"))
+CHAT_BREAKER_RESET_SECONDS = float(os.getenv("CHAT_BREAKER_RESET_SECONDS", "30"))
+CHAT_FALLBACK_THRESHOLD = float(os.getenv("CHAT_FALLBACK_THRESHOLD", "0.85"))
+
+# Bulk expense import: maximum items and body size per request and insert_many batch size
+EXPENSE_BULK_MAX_ITEMS = int(os.getenv("EXPENSE_BULK_MAX_ITEMS", "5000"))
+EXPENSE_BULK_MAX_BYTES = int(os.getenv("EXPENSE_BULK_MAX_BYTES", str(5 * 1024 * 1024)))
+EXPENSE_BULK_CHUNK_SIZE = int(os.getenv("EXPENSE_BULK_CHUNK_SIZE", "500"))
+# How long deleted expenses are kept as tombstones for syncing clients
+EXPENSE_TOMBSTONE_TTL_DAYS = int(os.getenv("EXPENSE_TOMBSTONE_TTL_DAYS", "90"))
+# After this many seconds an unfinished expense write no longer holds back delta sync
+EXPENSE_SYNC_WRITE_TIMEOUT_SECONDS = int(os.getenv("EXPENSE_SYNC_WRITE_TIMEOUT_SECONDS", "60"))
+
+# Number of most recent health assessments kept in each user's financial summary
+FINANCIAL_SUMMARY_WINDOW = int(os.getenv("FINANCIAL_SUMMARY_WINDOW", "5"))
+
+# Largest scenario grid accepted by the health assessment simulation endpoint
+SIMULATION_MAX_SCENARIOS = int(os.getenv("SIMULATION_MAX_SCENARIOS", "100000"))
+
+# Maximum farms per batch health assessment / loan advice request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# Loan advice reuses the user's stored assessment with identical inputs if it is at most this old
+LOAN_ADVICE_REUSE_MINUTES = int(os.getenv("LOAN_ADVICE_REUSE_MINUTES", "1440"))
+
+# Write-behind sink for history records (predictions, loan advice):
+# records are buffered and written with insert_many every RESULT_SINK_FLUSH_SECONDS
+# or once RESULT_SINK_BATCH_SIZE are waiting. Unwritten records are spooled
+# (optionally fsynced) to RESULT_SINK_SPOOL_DIR and replayed on the next start.
+RESULT_SINK_ENABLED = os.getenv("RESULT_SINK_ENABLED", "True").lower() in ('true', '1', 't')
+RESULT_SINK_BATCH_SIZE = int(os.getenv("RESULT_SINK_BATCH_SIZE", "200"))
+RESULT_SINK_FLUSH_SECONDS = float(os.getenv("RESULT_SINK_FLUSH_SECONDS", "1.0"))
+RESULT_SINK_SPOOL_DIR = os.getenv("RESULT_SINK_SPOOL_DIR", str(Path(__file__).resolve().parent / "spool"))
+RESULT_SINK_FSYNC = os.getenv("RESULT_SINK_FSYNC", "True").lower() in ('true', '1', 't')
+
+# Admin dashboard summaries are recomputed in the background for every time
+# filter every ADMIN_SNAPSHOT_INTERVAL_SECONDS; the last ADMIN_SNAPSHOT_KEEP
+# versions per filter are kept in the dashboard_snapshots collection
+ADMIN_SNAPSHOT_ENABLED = os.getenv("ADMIN_SNAPSHOT_ENABLED", "True").lower() in ('true', '1', 't')
+ADMIN_SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("ADMIN_SNAPSHOT_INTERVAL_SECONDS", "300"))
+ADMIN_SNAPSHOT_KEEP = int(os.getenv("ADMIN_SNAPSHOT_KEEP", "24"))
+
 # Rate limiting
 RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", MONGO_URI if APP_ENV == "production" else None)
 
@@ -77,6 +165,75 @@ CORS_ALLOW_HEADERS=*
 # Security Settings
 # Set to True when ready to implement HTTPS
 ENFORCE_HTTPS=False
+
+# Model Settings
+# Directory holding demand/min/max price models, recommendation model and encoders
+MODEL_DIR=../model
+# Seconds between checks for a model version switched by another worker
+MODEL_VERSION_CHECK_SECONDS=30
+# Load models at startup (set to False for tests/CI)
+WARM_UP_ON_STARTUP=True
+# Number of gunicorn workers sharing the preloaded models
+WEB_CONCURRENCY=2
+
+# Chatbot Settings
+GEMINI_API_KEY=your_gemini_api_key
+# Use "stub" to run the chatbot without Gemini or Google Translate (tests)
+CHAT_BACKEND=gemini
+# Translation cache (in-memory entries, "mongo" or "none" for the shared tier, TTL in days)
+TRANSLATION_CACHE_SIZE=10000
+TRANSLATION_CACHE_STORE=mongo
+TRANSLATION_CACHE_TTL_DAYS=30
+# Answer cache for near-duplicate chatbot questions
+# (tune the threshold with: python -m chatbot.answer_cache_benchmark <question_log>)
+ANSWER_CACHE_ENABLED=True
+ANSWER_CACHE_THRESHOLD=0.85
+ANSWER_CACHE_SIZE=5000
+ANSWER_CACHE_TTL_HOURS=168
+# Conversation sessions (turns kept, prompt history/summary token budgets, idle TTL,
+# max in-memory sessions, "mongo" or "memory" store)
+CHAT_SESSION_MAX_TURNS=6
+CHAT_HISTORY_TOKEN_BUDGET=1000
+CHAT_SESSION_SUMMARY_TOKENS=200
+CHAT_SESSION_TTL_MINUTES=30
+CHAT_SESSION_MAX_SESSIONS=10000
+CHAT_SESSION_STORE=mongo
+# Chatbot upstream limits (Gemini / Google Translate concurrency and timeouts, circuit breaker,
+# similarity threshold for cached fallback answers while the LLM is down)
+CHAT_LLM_MAX_CONCURRENCY=16
+CHAT_LLM_TIMEOUT_SECONDS=20
+CHAT_TRANSLATE_MAX_CONCURRENCY=8
+CHAT_TRANSLATE_TIMEOUT_SECONDS=5
+CHAT_QUEUE_TIMEOUT_SECONDS=2
+CHAT_BREAKER_FAILURES=5
+CHAT_BREAKER_RESET_SECONDS=30
+CHAT_FALLBACK_THRESHOLD=0.85
+# Bulk expense import (max items and body bytes per request, insert_many batch size)
+EXPENSE_BULK_MAX_ITEMS=5000
+EXPENSE_BULK_MAX_BYTES=5242880
+EXPENSE_BULK_CHUNK_SIZE=500
+# Days deleted expenses are kept as sync tombstones
+EXPENSE_TOMBSTONE_TTL_DAYS=90
+# Seconds an unfinished expense write may hold back delta sync
+EXPENSE_SYNC_WRITE_TIMEOUT_SECONDS=60
+# Recent health assessments kept per user summary
+FINANCIAL_SUMMARY_WINDOW=5
+# Largest what-if simulation grid (price x quantity x subsidy scenarios)
+SIMULATION_MAX_SCENARIOS=100000
+# Maximum farms per batch assessment / loan advice request
+BATCH_MAX_ITEMS=1000
+# Max age (minutes) of a stored assessment that loan advice may reuse
+LOAN_ADVICE_REUSE_MINUTES=1440
+# Write-behind history sink (batch size, flush interval, spool directory for unwritten records)
+RESULT_SINK_ENABLED=True
+RESULT_SINK_BATCH_SIZE=200
+RESULT_SINK_FLUSH_SECONDS=1.0
+RESULT_SINK_SPOOL_DIR=./spool
+RESULT_SINK_FSYNC=True
+# Background admin dashboard snapshots (refresh interval, versions kept per time filter)
+ADMIN_SNAPSHOT_ENABLED=True
+ADMIN_SNAPSHOT_INTERVAL_SECONDS=300
+ADMIN_SNAPSHOT_KEEP=24
 """
 
 def print_env_template():
@@ -0,0 +1,191 @@
+"""
+Server-side expense analytics shared by the farmer app and the admin dashboard.
+
+Totals are computed in MongoDB: one $facet aggregation over the user's
+expenses gives overall totals and breakdowns by crop, by month and by
+Ethiopian season; profit and income come from the user's financial
+(health) assessments.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from health_assessment.database import financials_collection
+from .database import expenses_collection
+
+# Ethiopian agricultural seasons by calendar month
+SEASONS = {
+    "kiremt": [6, 7, 8, 9],     # main rainy season
+    "bega": [10, 11, 12, 1],    # dry season, main harvest
+    "belg": [2, 3, 4, 5],       # short rainy season
+}
+
+_SEASON_EXPR = {
+    "$switch": {
+        "branches": [
+            {"case": {"$in": [{"$month": "$date"}, months]}, "then": season}
+            for season, months in SEASONS.items()
+        ],
+        "default": None,
+    }
+}
+
+_TOTALS = {
+    "totalCost": {"$sum": "$totalCost"},
+    "quantitySold": {"$sum": "$quantitySold"},
+    "count": {"$sum": 1},
+}
+
+
+def _date_match(field: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> Dict[str, Any]:
+    if not (start_date or end_date):
+        return {}
+    match = {}
+    if start_date:
+        match["$gte"] = start_date
+    if end_date:
+        match["$lte"] = end_date
+    return {field: match}
+
+
+def _breakdown(key: str, group_by) -> List[Dict[str, Any]]:
+    return [
+        {"$group": {"_id": group_by, **_TOTALS}},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, key: "$_id", "totalCost": 1, "quantitySold": 1, "count": 1}},
+    ]
+
+
+def expense_totals(user_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """Overall totals plus per-crop, per-month and per-season breakdowns."""
+    pipeline = [
+        {"$match": {"user_id": user_id, "deleted": {"$ne": True}, **_date_match("date", start_date, end_date)}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    **_TOTALS,
+                    "firstDate": {"$min": "$date"},
+                    "lastDate": {"$max": "$date"},
+                }},
+                {"$project": {"_id": 0}},
+            ],
+            "byCrop": _breakdown("cropType", "$cropType"),
+            "byMonth": _breakdown("month", {"$dateToString": {"format": "%Y-%m", "date": "$date"}}),
+            "bySeason": _breakdown("season", _SEASON_EXPR),
+        }},
+    ]
+    result = next(expenses_collection.aggregate(pipeline), {})
+    totals = (result.get("totals") or [{}])[0]
+    return {
+        "totals": {
+            "totalCost": totals.get("totalCost", 0.0),
+            "quantitySold": totals.get("quantitySold", 0.0),
+            "count": totals.get("count", 0),
+            "firstDate": totals.get("firstDate"),
+            "lastDate": totals.get("lastDate"),
+        },
+        "byCrop": result.get("byCrop", []),
+        "byMonth": result.get("byMonth", []),
+        "bySeason": result.get("bySeason", []),
+    }
+
+
+def profit_totals(user_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """Income and profit from the user's financial assessments, overall and per crop."""
+    pipeline = [
+        {"$match": {"user_id": ObjectId(user_id), **_date_match("created_at", start_date, end_date)}},
+        {"$group": {
+            "_id": "$input.cropType",
+            "totalIncome": {"$sum": "$output.totalIncome"},
+            "profit": {"$sum": "$output.profit"},
+            "financialStability": {"$sum": "$output.financialStability"},
+            "cashFlow": {"$sum": "$output.cashFlow"},
+            "count": {"$sum": 1},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    by_crop = list(financials_collection.aggregate(pipeline))
+    count = sum(doc["count"] for doc in by_crop)
+    return {
+        "totalIncome": sum((doc["totalIncome"] for doc in by_crop), 0.0),
+        "profit": sum((doc["profit"] for doc in by_crop), 0.0),
+        "assessmentCount": count,
+        "financialStabilityAvg": sum(doc["financialStability"] for doc in by_crop) / count if count else None,
+        "cashFlowAvg": sum(doc["cashFlow"] for doc in by_crop) / count if count else None,
+        "byCrop": [
+            {"cropType": doc["_id"], "totalIncome": doc["totalIncome"], "profit": doc["profit"], "count": doc["count"]}
+            for doc in by_crop
+        ],
+    }
+
+
+def expense_summary(user_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """Expense totals and breakdowns together with assessment profit for one user."""
+    return {
+        **expense_totals(user_id, start_date, end_date),
+        "profit": profit_totals(user_id, start_date, end_date),
+    }
+
+
+def expense_totals_by_user_pipeline(
+    user_ids: List[str],
+    start_date: Optional[datetime] = None,
+    top_crops: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Aggregation for expense totals and per-crop counts of many users, one
+    result document per user. byCrop is ordered by entry count, largest
+    first, and holds only the first ``top_crops`` crops when given.
+    """
+    pipeline = [
+        {"$match": {"user_id": {"$in": user_ids}, "deleted": {"$ne": True}, **_date_match("date", start_date, None)}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "cropType": "$cropType"},
+            **_TOTALS,
+            "lastDate": {"$max": "$date"},
+        }},
+        {"$sort": {"count": -1, "_id.cropType": 1}},
+        {"$group": {
+            "_id": "$_id.user_id",
+            "totalCost": {"$sum": "$totalCost"},
+            "quantitySold": {"$sum": "$quantitySold"},
+            "count": {"$sum": "$count"},
+            "lastDate": {"$max": "$lastDate"},
+            "byCrop": {"$push": {"cropType": "$_id.cropType", "totalCost": "$totalCost", "count": "$count"}},
+        }},
+    ]
+    if top_crops:
+        pipeline.append({"$set": {"byCrop": {"$slice": ["$byCrop", top_crops]}}})
+    return pipeline
+
+
+def expense_totals_by_user(
+    user_ids: List[str],
+    start_date: Optional[datetime] = None,
+    top_crops: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Expense totals and per-crop counts for many users in one aggregation."""
+    pipeline = expense_totals_by_user_pipeline(user_ids, start_date, top_crops)
+    return {doc.pop("_id"): doc for doc in expenses_collection.aggregate(pipeline, allowDiskUse=True)}
+
+
+def profit_totals_by_user(user_ids: List[str], start_date: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Assessment income and profit for many users in one aggregation."""
+    pipeline = [
+        {"$match": {
+            "user_id": {"$in": [ObjectId(user_id) for user_id in user_ids]},
+            **_date_match("created_at", start_date, None),
+        }},
+        {"$group": {
+            "_id": "$user_id",
+            "totalIncome": {"$sum": "$output.totalIncome"},
+            "profit": {"$sum": "$output.profit"},
+            "assessmentCount": {"$sum": 1},
+            "financialStabilityAvg": {"$avg": "$output.financialStability"},
+            "cashFlowAvg": {"$avg": "$output.cashFlow"},
+        }},
+    ]
+    return {str(doc.pop("_id")): doc for doc in financials_collection.aggregate(pipeline, allowDiskUse=True)}
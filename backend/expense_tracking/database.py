@@ -1,9 +1,12 @@
 from pymongo import MongoClient
 import config
+from storage import get_collection
 
 client = MongoClient(config.MONGO_URI)
 db = client[config.DB_NAME]
 
 # Collections
-expenses_collection = db.expenses
+expenses_collection = get_collection("expenses", db)
+# Per-user change counters for expense sync versions
+expense_sync_counters_collection = db.expense_sync_counters
 assessments_collection = db.assessments
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Query, HTTPException, Depends
-from typing import Optional
+import hashlib
+import json
+from datetime import datetime
+from fastapi import APIRouter, Query, HTTPException, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from typing import Any, List, Optional
+import config
+from .analytics import expense_summary
 from .model import Expense
 from .service import (
     add_expense,
+    add_expenses_bulk,
     get_expenses,
+    get_expense_changes,
+    listing_version,
     update_expense,
     delete_expense,
 )
@@ -21,20 +31,173 @@ def create_expense(expense: Expense, current_user: dict = Depends(get_current_ac
     expense_id = add_expense(expense)
     return {"message": "Expense added successfully", "id": expense_id}
 
+async def read_bulk_payload(request: Request) -> List[Any]:
+    """
+    Read a bulk upload given either as a JSON array or as NDJSON (one
+    expense object per line). NDJSON is parsed line by line as it arrives.
+    Bodies over EXPENSE_BULK_MAX_BYTES are rejected with 413 while reading,
+    before anything is buffered past the limit.
+    """
+    max_items = config.EXPENSE_BULK_MAX_ITEMS
+    max_bytes = config.EXPENSE_BULK_MAX_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    items: List[Any] = []
+    buffer = b""
+    received = 0
+    is_array = None
+    line_no = 0
+
+    def parse_line(line: bytes):
+        nonlocal line_no
+        line_no += 1
+        if not line.strip():
+            return
+        if len(items) >= max_items:
+            raise HTTPException(status_code=413, detail=f"At most {max_items} expenses per request")
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_no}")
+
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise too_large
+        buffer += chunk
+        if is_array is None and buffer.strip():
+            is_array = buffer.lstrip().startswith(b"[")
+        if is_array is False:
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                parse_line(line)
+
+    if is_array:
+        try:
+            items = json.loads(buffer)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON array")
+        if len(items) > max_items:
+            raise HTTPException(status_code=413, detail=f"At most {max_items} expenses per request")
+    else:
+        parse_line(buffer)
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No expenses provided")
+    return items
+
+@router.post("/expenses/bulk")
+async def create_expenses_bulk(request: Request, current_user: dict = Depends(get_current_active_user)):
+    """
+    Import many expenses in one request (e.g. an offline sync).
+
+    The body is a JSON array of expenses or NDJSON with one expense per line.
+    Valid items are saved even if others fail; ``errors`` lists each failed
+    item by its position in the upload.
+    """
+    user_id = str(current_user["_id"])
+    items = await read_bulk_payload(request)
+    return await run_in_threadpool(add_expenses_bulk, items, user_id)
+
+EXPENSE_FIELDS = set(Expense.model_fields) - {"user_id"}
+
 @router.get("/expenses")
 def list_expenses(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; paging (100 per page) also starts when a cursor is given"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    crop_type: Optional[str] = Query(None, alias="cropType"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. date,cropType,totalCost"),
     current_user: dict = Depends(get_current_active_user) 
 ):
+    """
+    List the user's expenses, newest first.
+
+    Without ``limit`` or ``cursor`` every expense is returned, as before
+    paging existed. With either, one page is returned and the cursor for the
+    next page comes in the ``X-Next-Cursor`` header (absent on the last
+    page). Responses carry an ``ETag``; send it back in ``If-None-Match`` to
+    get 304 when nothing has changed. It is checked before the listing is
+    queried.
+    """
+    user_id = str(current_user["_id"])
+    field_list = None
+    if fields:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(field_list) - EXPENSE_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    if limit is None and cursor:
+        limit = 100
+
+    # The ETag covers the user's expense writes and the query, so an
+    # unchanged listing is answered without running it
+    validator = f"{user_id}|{listing_version(user_id)}|{sorted(request.query_params.multi_items())}"
+    etag = '"' + hashlib.sha1(validator.encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        expenses, next_cursor = get_expenses(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            start_date=start_date,
+            end_date=end_date,
+            crop_type=crop_type,
+            fields=field_list,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    body = json.dumps(jsonable_encoder(expenses), separators=(",", ":")).encode()
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/expenses/changes")
+def list_expense_changes(
+    since: int = Query(0, ge=0, description="cursor from the previous sync; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Delta sync for offline clients.
+
+    Returns expenses created, updated or deleted since the given cursor,
+    deleted ones as tombstones. Store the returned ``cursor`` and call again
+    while ``has_more`` is true. Tombstones are kept for
+    EXPENSE_TOMBSTONE_TTL_DAYS; a client offline for longer should sync
+    again from 0.
+    """
+    user_id = str(current_user["_id"])
+    return get_expense_changes(user_id, since=since, limit=limit)
+
+@router.get("/expenses/summary")
+def expenses_summary(
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Expense totals computed on the server: overall, by crop, by month
+    (YYYY-MM) and by season (kiremt, bega, belg), plus income and profit
+    from the user's financial assessments.
+    """
     user_id = str(current_user["_id"])
-    filter_by = {"user_id": user_id}
-    expenses = get_expenses(filter_by)
-    return expenses
+    return expense_summary(user_id, start_date=start_date, end_date=end_date)
 
 @router.put("/expenses/{expense_id}")
 def edit_expense(expense_id: str, expense_update: Expense, current_user: dict = Depends(get_current_active_user)):
     user_id = str(current_user["_id"])
     expense_update.user_id = user_id 
-    updated = update_expense(expense_id, expense_update.model_dump())
+    updated = update_expense(expense_id, user_id, expense_update.model_dump())
     if not updated:
         raise HTTPException(status_code=404, detail="Expense not found")
     return {"message": "Expense updated successfully"}
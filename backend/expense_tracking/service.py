@@ -1,34 +1,326 @@
 # service.py
 
+import base64
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from .model import Expense
-from typing import List
-from .database import expenses_collection, assessments_collection
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .database import expenses_collection, assessments_collection, expense_sync_counters_collection
 from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import config
+
+# Expenses marked deleted (tombstones) are kept for sync but hidden elsewhere
+NOT_DELETED = {"deleted": {"$ne": True}}
+
+# --- Sync versions ---
+@contextmanager
+def reserve_versions(user_id: str, count: int = 1) -> Iterator[range]:
+    """
+    Reserve ``count`` consecutive change versions for a user around a write.
+
+    Every insert, update and delete stamps the expense with a new version
+    from this per-user counter, so clients can ask for everything changed
+    after the last version they have seen. Versions are handed out before
+    the write commits, so the reservation stays listed as pending on the
+    counter until the block exits; delta sync never answers past a pending
+    version (see ``synced_version``).
+    """
+    versions = _reserve(user_id, count)
+    try:
+        yield versions
+    finally:
+        expense_sync_counters_collection.update_one(
+            {"_id": user_id},
+            {"$pull": {"pending": {"version": versions.start}}}
+        )
+
+def _reserve(user_id: str, count: int) -> range:
+    while True:
+        counter = expense_sync_counters_collection.find_one({"_id": user_id}, {"seq": 1}) or {}
+        seq = counter.get("seq", 0)
+        try:
+            # Compare-and-set on seq; the upsert only inserts for a new user
+            # and fails with a duplicate key if another write got there first
+            result = expense_sync_counters_collection.update_one(
+                {"_id": user_id, "seq": seq},
+                {
+                    "$set": {"seq": seq + count},
+                    "$push": {"pending": {"version": seq + 1, "at": datetime.utcnow()}},
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            continue
+        if result.matched_count or result.upserted_id is not None:
+            return range(seq + 1, seq + count + 1)
+
+def synced_version(user_id: str) -> int:
+    """
+    Highest version below every write still in progress for the user.
+
+    Everything up to it is committed (or abandoned), so a sync cursor never
+    moves past a version that may still be written. Reservations older
+    than EXPENSE_SYNC_WRITE_TIMEOUT_SECONDS belong to writes that died and
+    are dropped.
+    """
+    counter = expense_sync_counters_collection.find_one({"_id": user_id})
+    if counter is None:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(seconds=config.EXPENSE_SYNC_WRITE_TIMEOUT_SECONDS)
+    pending = counter.get("pending", [])
+    live = [entry["version"] for entry in pending if entry["at"] >= cutoff]
+    if len(live) < len(pending):
+        expense_sync_counters_collection.update_one(
+            {"_id": user_id},
+            {"$pull": {"pending": {"at": {"$lt": cutoff}}}}
+        )
+    return min(live) - 1 if live else counter["seq"]
+
+def backfill_versions(user_id: str) -> None:
+    """Give versions to expenses written before sync versions existed."""
+    legacy_ids = [doc["_id"] for doc in expenses_collection.find({"user_id": user_id, "version": {"$exists": False}}, {"_id": 1})]
+    if not legacy_ids:
+        return
+    now = datetime.utcnow()
+    with reserve_versions(user_id, len(legacy_ids)) as versions:
+        operations = [
+            UpdateOne({"_id": expense_id, "version": {"$exists": False}}, {"$set": {"version": version, "updated_at": now}})
+            for expense_id, version in zip(legacy_ids, versions)
+        ]
+        expenses_collection.bulk_write(operations, ordered=False)
 
 # --- Expenses ---
 def add_expense(expense_data: Expense) -> str:
     expense_dict = expense_data.model_dump()
-    result = expenses_collection.insert_one(expense_dict)
+    with reserve_versions(expense_data.user_id) as versions:
+        expense_dict["version"] = versions[0]
+        expense_dict["updated_at"] = datetime.utcnow()
+        result = expenses_collection.insert_one(expense_dict)
     return str(result.inserted_id)
 
-def get_expenses(filter_by: dict = None) -> List[dict]:
-    filter_query = filter_by or {}
+def add_expenses_bulk(items: List[Any], user_id: str) -> Dict[str, Any]:
+    """
+    Validate and insert many expenses for one user.
+
+    Every item is checked with the Expense validators; valid ones are written
+    with unordered insert_many in chunks, so one bad record does not stop the
+    rest. ``ids`` follows the submitted order, with None for failed items.
+    """
+    ids: List[Optional[str]] = [None] * len(items)
+    errors = []
+    documents = []
+    positions = []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "errors": [{"field": None, "message": "Expense must be a JSON object"}]})
+            continue
+        try:
+            expense = Expense.model_validate({**item, "user_id": user_id})
+        except ValidationError as e:
+            errors.append({
+                "index": index,
+                "errors": [
+                    {"field": ".".join(str(part) for part in err["loc"]) or None, "message": err["msg"]}
+                    for err in e.errors()
+                ]
+            })
+            continue
+        document = expense.model_dump()
+        document["_id"] = ObjectId()
+        documents.append(document)
+        positions.append(index)
+
+    if documents:
+        # Keep the versions reserved until every chunk is written
+        with reserve_versions(user_id, len(documents)) as versions:
+            now = datetime.utcnow()
+            for document, version in zip(documents, versions):
+                document["version"] = version
+                document["updated_at"] = now
+            _insert_chunks(documents, positions, ids, errors)
+
+    errors.sort(key=lambda error: error["index"])
+    inserted = sum(1 for expense_id in ids if expense_id is not None)
+    return {
+        "inserted": inserted,
+        "failed": len(items) - inserted,
+        "ids": ids,
+        "errors": errors,
+    }
+
+def _insert_chunks(documents: List[dict], positions: List[int], ids: List[Optional[str]], errors: List[dict]) -> None:
+    """Insert ``documents`` in unordered chunks, filling ``ids`` and ``errors`` by submitted position."""
+    chunk_size = config.EXPENSE_BULK_CHUNK_SIZE
+    for start in range(0, len(documents), chunk_size):
+        chunk = documents[start:start + chunk_size]
+        failed = set()
+        try:
+            expenses_collection.insert_many(chunk, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed.add(write_error["index"])
+                errors.append({
+                    "index": positions[start + write_error["index"]],
+                    "errors": [{"field": None, "message": write_error.get("errmsg", "Write failed")}]
+                })
+        for offset, document in enumerate(chunk):
+            if offset not in failed:
+                ids[positions[start + offset]] = str(document["_id"])
+
+def encode_cursor(expense: dict) -> str:
+    """Opaque page cursor: the (date, _id) sort key of the last item."""
+    raw = f"{expense['date'].isoformat()}|{expense['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        date, expense_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(date), ObjectId(expense_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def get_expenses(
+    user_id: str,
+    limit: Optional[int] = 100,
+    cursor: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    crop_type: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of a user's expenses, newest first.
+
+    Sorted by (date, _id) descending so the (user_id, date, _id) and
+    (user_id, cropType, date, _id) indexes serve both the filter and the
+    sort. Returns the page and the cursor for the next one (None on the
+    last page). ``limit=None`` returns every matching expense in one list.
+    ``fields`` limits the returned fields; ``_id`` and ``date`` are always
+    included.
+    """
+    filter_query: Dict[str, Any] = {"user_id": user_id, **NOT_DELETED}
+    if crop_type:
+        filter_query["cropType"] = crop_type
+    if start_date or end_date:
+        filter_query["date"] = {}
+        if start_date:
+            filter_query["date"]["$gte"] = start_date
+        if end_date:
+            filter_query["date"]["$lte"] = end_date
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        filter_query["$or"] = [
+            {"date": {"$lt": last_date}},
+            {"date": last_date, "_id": {"$lt": last_id}},
+        ]
+
+    projection = None
+    if fields:
+        projection = {field: 1 for field in fields}
+        projection["date"] = 1
+
+    query = expenses_collection.find(filter_query, projection).sort([("date", DESCENDING), ("_id", DESCENDING)])
+    next_cursor = None
+    if limit is not None:
+        # Fetch one extra document to know whether another page exists
+        documents = list(query.limit(limit + 1))
+        if len(documents) > limit:
+            next_cursor = encode_cursor(documents[limit - 1])
+            documents = documents[:limit]
+    else:
+        documents = list(query)
+
     expenses = []
-    for expense in expenses_collection.find(filter_query):
+    for expense in documents:
         expense["_id"] = str(expense["_id"])  # Make _id JSON serializable
         expenses.append(expense)
-    return expenses
+    return expenses, next_cursor
+
+def listing_version(user_id: str) -> str:
+    """
+    Cheap validator for the user's expense listing: changes whenever a write
+    is reserved or finishes (the sync counter and its pending versions), so
+    it can be compared before the listing is queried.
+    """
+    counter = expense_sync_counters_collection.find_one({"_id": user_id}) or {}
+    pending = sorted(entry["version"] for entry in counter.get("pending", []))
+    return f"{counter.get('seq', 0)}:{','.join(map(str, pending))}"
 
-def update_expense(expense_id: str, updated_data: dict) -> bool:
-    result = expenses_collection.update_one(
-        {"_id": ObjectId(expense_id)},
-        {"$set": updated_data}
+def get_expense_changes(user_id: str, since: int = 0, limit: int = 500) -> Dict[str, Any]:
+    """
+    Expenses created, updated or deleted after version ``since``, oldest first.
+    Changes are only returned up to ``synced_version``, so a later cursor
+    never skips a write that was still in progress.
+
+    Deleted expenses come back as tombstones ({"_id", "deleted": True,
+    "version"}). Pass the returned ``cursor`` as ``since`` on the next call;
+    ``has_more`` tells the client to call again straight away.
+    """
+    if since == 0:
+        backfill_versions(user_id)
+    upto = synced_version(user_id)
+    if upto <= since:
+        return {"changes": [], "cursor": since, "has_more": False}
+    documents = list(
+        expenses_collection.find({"user_id": user_id, "version": {"$gt": since, "$lte": upto}})
+        .sort("version", ASCENDING)
+        .limit(limit + 1)
     )
-    return result.modified_count > 0
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+
+    changes = []
+    for document in documents:
+        document["_id"] = str(document["_id"])
+        if document.get("deleted"):
+            document = {
+                "_id": document["_id"],
+                "deleted": True,
+                "version": document["version"],
+                "updated_at": document.get("updated_at"),
+            }
+        changes.append(document)
+    return {
+        "changes": changes,
+        "cursor": documents[-1]["version"] if documents else since,
+        "has_more": has_more,
+    }
+
+def update_expense(expense_id: str, user_id: str, updated_data: dict) -> bool:
+    if not ObjectId.is_valid(expense_id):
+        return False
+    with reserve_versions(user_id) as versions:
+        updated_data = {
+            **updated_data,
+            "version": versions[0],
+            "updated_at": datetime.utcnow(),
+        }
+        result = expenses_collection.update_one(
+            {"_id": ObjectId(expense_id), "user_id": user_id, **NOT_DELETED},
+            {"$set": updated_data}
+        )
+    return result.matched_count > 0
 
-def delete_expense(expense_id: str) -> bool:
-    result = expenses_collection.delete_one({"_id": ObjectId(expense_id)})
-    return result.deleted_count > 0
+def delete_expense(expense_id: str, user_id: str) -> bool:
+    """Mark an expense deleted, keeping a tombstone so syncing clients see the delete."""
+    if not ObjectId.is_valid(expense_id):
+        return False
+    now = datetime.utcnow()
+    with reserve_versions(user_id) as versions:
+        result = expenses_collection.update_one(
+            {"_id": ObjectId(expense_id), "user_id": user_id, **NOT_DELETED},
+            {"$set": {
+                "deleted": True,
+                "deleted_at": now,
+                "version": versions[0],
+                "updated_at": now
+            }}
+        )
+    return result.matched_count > 0
 
 # --- Assessments ---
 def get_assessments(filter_by: dict = None) -> List[dict]:
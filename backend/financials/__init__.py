@@ -0,0 +1,10 @@
+# Financials module initialization
+from .metrics import (
+    FinancialMetrics, METRIC_FIELDS, financial_metrics, metrics_for, input_hash,
+    financial_metrics_array, input_columns, metrics_rows
+)
+
+__all__ = [
+    'FinancialMetrics', 'METRIC_FIELDS', 'financial_metrics', 'metrics_for', 'input_hash',
+    'financial_metrics_array', 'input_columns', 'metrics_rows'
+]
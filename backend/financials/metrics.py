@@ -0,0 +1,94 @@
+"""
+Farm financial metrics shared by health assessment, loan advice and the
+what-if simulation.
+
+    totalIncome        = quantitySold * salePricePerQuintal
+    profit             = totalIncome + governmentSubsidy - totalCost
+    financialStability = profit / totalCost * 100   (0 when totalCost is 0)
+    cashFlow           = totalCost / totalIncome * 100   (0 when totalIncome is 0)
+    totalExpense       = totalCost
+
+``financial_metrics`` is the scalar entry point; ``financial_metrics_array``
+computes the same formulas over NumPy arrays for batches and scenario grids.
+Resubmitted numbers are recognised by ``input_hash`` and served from the
+stored assessment rather than recomputed.
+"""
+
+import hashlib
+from typing import Dict, Iterable, List, NamedTuple
+
+import numpy as np
+
+METRIC_FIELDS = ("totalIncome", "profit", "financialStability", "cashFlow", "totalExpense")
+INPUT_FIELDS = ("quantitySold", "salePricePerQuintal", "governmentSubsidy", "totalCost")
+
+
+class FinancialMetrics(NamedTuple):
+    totalIncome: float
+    profit: float
+    financialStability: float
+    cashFlow: float
+    totalExpense: float
+
+
+def financial_metrics(quantity_sold: float, sale_price: float, subsidy: float, total_cost: float) -> FinancialMetrics:
+    total_income = quantity_sold * sale_price
+    profit = total_income + subsidy - total_cost
+    return FinancialMetrics(
+        totalIncome=total_income,
+        profit=profit,
+        financialStability=(profit / total_cost * 100) if total_cost != 0 else 0,
+        cashFlow=(total_cost / total_income * 100) if total_income != 0 else 0,
+        totalExpense=total_cost,
+    )
+
+
+def metrics_for(data) -> FinancialMetrics:
+    """financial_metrics for any object with the CropData fields."""
+    return financial_metrics(data.quantitySold, data.salePricePerQuintal, data.governmentSubsidy, data.totalCost)
+
+
+def input_hash(data) -> str:
+    """
+    Stable hash of the inputs the metrics depend on, used to recognise a
+    stored assessment with the same numbers (cropType does not affect them).
+    """
+    canonical = "|".join(repr(float(getattr(data, field) or 0)) for field in INPUT_FIELDS)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def financial_metrics_array(quantity_sold, sale_price, subsidy, total_cost) -> Dict[str, np.ndarray]:
+    """The same formulas on arrays (inputs broadcast against each other)."""
+    quantity_sold, sale_price, subsidy, total_cost = (
+        np.asarray(v, dtype=float) for v in (quantity_sold, sale_price, subsidy, total_cost)
+    )
+    total_income = quantity_sold * sale_price
+    profit = total_income + subsidy - total_cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        financial_stability = np.where(total_cost != 0, profit / total_cost * 100, 0.0)
+        cash_flow = np.where(total_income != 0, total_cost / total_income * 100, 0.0)
+    return {
+        "totalIncome": total_income,
+        "profit": profit,
+        "financialStability": financial_stability,
+        "cashFlow": cash_flow,
+        "totalExpense": np.broadcast_to(total_cost, profit.shape),
+    }
+
+
+def input_columns(items: Iterable) -> Dict[str, np.ndarray]:
+    """CropData-like objects as one float array per input field."""
+    items = list(items)
+    return {
+        field: np.fromiter((getattr(item, field) for item in items), dtype=float, count=len(items))
+        for field in INPUT_FIELDS
+    }
+
+
+def metrics_rows(items: Iterable) -> List[dict]:
+    """financial_metrics for many items at once, as one dict per item."""
+    columns = input_columns(items)
+    results = financial_metrics_array(
+        columns["quantitySold"], columns["salePricePerQuintal"], columns["governmentSubsidy"], columns["totalCost"]
+    )
+    return [dict(zip(METRIC_FIELDS, row)) for row in zip(*(results[field].tolist() for field in METRIC_FIELDS))]
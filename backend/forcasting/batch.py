@@ -0,0 +1,102 @@
+"""
+Offline batch scoring for market price lists.
+
+Streams a CSV or Parquet file through the same demand/min/max price models
+as /predict, one chunk at a time, and appends the predictions to the output
+file as each chunk is scored, so memory stays flat regardless of input size.
+
+Usage (from the backend directory):
+    python -m forcasting.batch prices.csv scored.csv
+    python -m forcasting.batch prices.parquet scored.parquet --chunksize 50000 --threads 8
+
+The input must contain the columns region, zone, woreda, marketname,
+cropname, varietyname and season; any other columns are passed through.
+Parquet input/output requires pyarrow.
+"""
+
+import argparse
+import sys
+import time
+from typing import Iterator
+
+import pandas as pd
+
+from model_store import get_active_bundle
+from .services import FEATURE_COLUMNS, predict_frame
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def read_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the input file as DataFrames of at most ``chunksize`` rows."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        # Read features as strings so numeric-looking codes keep their form
+        yield from pd.read_csv(path, chunksize=chunksize, dtype={column: str for column in FEATURE_COLUMNS})
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode="a" if self._wrote_header else "w", header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_file(input_path: str, output_path: str, chunksize: int = 10000, thread_count: int = -1) -> int:
+    """Score ``input_path`` into ``output_path`` and return the number of rows."""
+    # Pin one bundle for the whole run so a model reload cannot mix versions
+    bundle = get_active_bundle()
+    writer = ChunkWriter(output_path)
+    total_rows = 0
+    start = time.time()
+
+    try:
+        for chunk in read_chunks(input_path, chunksize):
+            predictions = predict_frame(chunk, bundle, thread_count=thread_count)
+            scored = pd.concat([chunk, predictions], axis=1)
+            scored["model_version"] = bundle.version
+            writer.write(scored)
+
+            total_rows += len(chunk)
+            elapsed = time.time() - start
+            print(f"Scored {total_rows} rows ({total_rows / elapsed:.0f} rows/s)", file=sys.stderr)
+    finally:
+        writer.close()
+
+    return total_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch-score a market price list with the forecasting models")
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--chunksize", type=int, default=10000, help="Rows scored per chunk (default: 10000)")
+    parser.add_argument("--threads", type=int, default=-1, help="CatBoost threads per chunk (default: all cores)")
+    args = parser.parse_args()
+
+    rows = score_file(args.input, args.output, chunksize=args.chunksize, thread_count=args.threads)
+    print(f"Wrote {rows} scored rows to {args.output}")
@@ -1,14 +1,17 @@
 from datetime import datetime
 from bson import ObjectId
 from auth.database import db  
+from storage import get_result_sink, get_collection
 
-prediction_collection = db.crop_forecasting_predictions
+prediction_collection = get_collection("predictions", db)
 
-def save_prediction_result(user_id, input_data: dict, prediction_result: dict):
+def save_prediction_result(user_id, input_data: dict, prediction_result: dict, model_version: str = None):
     record = {
         "user_id": ObjectId(user_id),
         "input": input_data,
         "output": prediction_result,
+        "model_version": model_version,
         "created_at": datetime.utcnow()
     }
-    return prediction_collection.insert_one(record)
+    # History only: written in the background by the result sink
+    return get_result_sink().submit(prediction_collection.name, record)
@@ -4,6 +4,7 @@ from .services import make_predictions
 from .database import save_prediction_result
 from auth.dependencies import get_current_active_user
 from security.rate_limiter import limiter
+from model_store import get_active_bundle
 
 router = APIRouter(
 #     prefix="/forcasting",
@@ -22,10 +23,11 @@ async def predict(
 ):
     try:
         serialized_data = data.model_dump()
-        result = make_predictions(serialized_data)
+        bundle = get_active_bundle()
+        result = make_predictions(serialized_data, bundle)
         
         user_id = current_user["_id"]
-        save_prediction_result(user_id, serialized_data, result)
+        save_prediction_result(user_id, serialized_data, result, model_version=bundle.version)
 
         return {"success": True, "data": result}
     except Exception as e:
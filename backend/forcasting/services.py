@@ -1,31 +1,48 @@
-import os
 import pandas as pd
-from catboost import CatBoostClassifier, CatBoostRegressor
+from model_store import ModelBundle, get_active_bundle
 
-# Adjust the base_model_path to point to the model directory
-base_model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "..", "model")
-base_model_path = os.path.abspath(base_model_path)  # Ensure the path is absolute
+# Feature columns expected by the demand and price models, in training order
+FEATURE_COLUMNS = ["region", "zone", "woreda", "marketname", "cropname", "varietyname", "season"]
 
-# Load models
-demand_model = CatBoostClassifier()
-demand_model.load_model(os.path.join(base_model_path, "demand_model.cbm"))
 
-min_model = CatBoostRegressor()
-min_model.load_model(os.path.join(base_model_path, "min_price_model.cbm"))
+def load_models(bundle: ModelBundle = None):
+    """Load the forecasting models (no-op once they are resident)."""
+    bundle = bundle or get_active_bundle()
+    return bundle.get("demand"), bundle.get("min_price"), bundle.get("max_price")
 
-max_model = CatBoostRegressor()
-max_model.load_model(os.path.join(base_model_path, "max_price_model.cbm"))
 
-def make_predictions(input_data: dict):
+def predict_frame(input_df: pd.DataFrame, bundle: ModelBundle = None, thread_count: int = -1) -> pd.DataFrame:
+    """
+    Score every row of ``input_df`` in one vectorized call per model.
+
+    ``thread_count`` is passed to CatBoost (-1 uses all cores).
+    """
+    missing = [column for column in FEATURE_COLUMNS if column not in input_df.columns]
+    if missing:
+        raise ValueError(f"Missing input columns: {', '.join(missing)}")
+
+    # Models are shared process-wide and loaded on first use. All three come
+    # from the same bundle even if a new version is swapped in meanwhile.
+    demand_model, min_model, max_model = load_models(bundle)
+    # Blank cells (NaN) would reach CatBoost as a non-string categorical
+    # value and fail the whole frame; score them as an empty category
+    features = input_df[FEATURE_COLUMNS].fillna("").astype(str)
+
+    return pd.DataFrame({
+        "Predicted Demand": demand_model.predict(features, thread_count=thread_count).ravel().astype(str),
+        "Predicted Min Price": min_model.predict(features, thread_count=thread_count).astype(float),
+        "Predicted Max Price": max_model.predict(features, thread_count=thread_count).astype(float),
+    }, index=input_df.index)
+
+
+def make_predictions(input_data: dict, bundle: ModelBundle = None):
     single_value_input = {key: value[0] for key, value in input_data.items()}
     input_df = pd.DataFrame([single_value_input])
     
-    demand_pred = demand_model.predict(input_df)[0]
-    min_price_pred = min_model.predict(input_df)[0]
-    max_price_pred = max_model.predict(input_df)[0]
+    prediction = predict_frame(input_df, bundle, thread_count=1).iloc[0]
     
     return {
-        "Predicted Demand": str(demand_pred[0]),
-        "Predicted Min Price": float(min_price_pred),
-        "Predicted Max Price": float(max_price_pred)
+        "Predicted Demand": str(prediction["Predicted Demand"]),
+        "Predicted Min Price": float(prediction["Predicted Min Price"]),
+        "Predicted Max Price": float(prediction["Predicted Max Price"])
     }
\ No newline at end of file
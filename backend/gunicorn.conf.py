@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration for running the API with multiple worker processes.
+
+Usage (from the backend directory):
+    gunicorn main:app -c gunicorn.conf.py
+
+The app and all model artifacts are loaded once in the master process and the
+workers are forked from it, so the read-only model memory is shared between
+workers instead of being loaded again by each of them.
+"""
+
+import config
+from model_store import preload_models
+
+bind = f"{config.APP_HOST}:{config.APP_PORT}"
+workers = config.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the application in the master before forking
+preload_app = True
+
+
+def on_starting(server):
+    """Load every model artifact in the master so forked workers share it."""
+    preload_models()
+    server.log.info("Model artifacts preloaded for %s workers", workers)
@@ -1,14 +1,203 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from auth.database import db
+from storage import get_collection
+import config
 
-financials_collection = db.financial_assessments
+financials_collection = get_collection("financial_assessments", db)
+# One document per user, kept up to date on every save_crop_financial. Saves
+# only increment an existing summary; a missing one, or one without the
+# current SUMMARY_VERSION, is rebuilt from the assessments instead.
+summaries_collection = db.financial_summaries
+SUMMARY_VERSION = 1
 
-def save_crop_financial(user_id, crop_input: dict, result: dict):
+# Output fields tracked in the per-user summary
+SUMMARY_FIELDS = ("financialStability", "cashFlow", "profit", "totalIncome", "totalExpense")
+
+
+def crop_key(crop_type: str) -> str:
+    """Crop name usable as a field name ('.' and leading '$' are not allowed)."""
+    return (crop_type or "unknown").strip().lower().replace(".", "_").lstrip("$") or "unknown"
+
+
+def summary_update(entries, created_at: datetime) -> dict:
+    """Atomic update folding assessments, given as (input, output) pairs, into the user's summary."""
+    increments = {"count": 0}
+    crop_names = {}
+    recent = []
+    for crop_input, result in entries:
+        crop = crop_key(crop_input.get("cropType"))
+        values = {field: float(result.get(field, 0) or 0) for field in SUMMARY_FIELDS}
+        increments["count"] += 1
+        increments[f"crops.{crop}.count"] = increments.get(f"crops.{crop}.count", 0) + 1
+        for field, value in values.items():
+            increments[f"totals.{field}"] = increments.get(f"totals.{field}", 0.0) + value
+            increments[f"crops.{crop}.totals.{field}"] = increments.get(f"crops.{crop}.totals.{field}", 0.0) + value
+        crop_names[f"crops.{crop}.cropType"] = crop_input.get("cropType")
+        recent.append({**values, "cropType": crop_input.get("cropType"), "created_at": created_at})
+    return {
+        "$inc": increments,
+        "$set": {**crop_names, "updated_at": created_at},
+        # Rolling window of the most recent assessments, newest last
+        "$push": {
+            "recent": {
+                "$each": recent[-config.FINANCIAL_SUMMARY_WINDOW:],
+                "$slice": -config.FINANCIAL_SUMMARY_WINDOW,
+            }
+        },
+    }
+
+
+def update_financial_summary(user_id, entries, created_at: datetime) -> None:
+    """
+    Fold just-saved assessments into the user's summary. Only a current
+    summary is incremented; otherwise (e.g. the user's first save after
+    summaries were introduced) it is rebuilt, which includes them.
+    """
+    result = summaries_collection.update_one(
+        {"_id": ObjectId(user_id), "version": SUMMARY_VERSION},
+        summary_update(entries, created_at)
+    )
+    if not result.matched_count:
+        rebuild_financial_summary(user_id)
+
+
+def save_crop_financial(user_id, crop_input: dict, result: dict, input_hash: str = None) -> ObjectId:
+    """Save one assessment and fold it into the user's summary; returns the new assessment id."""
     record = {
+        "_id": ObjectId(),
         "user_id": ObjectId(user_id),
         "input": crop_input,
+        "input_hash": input_hash,
         "output": result,
         "created_at": datetime.utcnow()
     }
-    return financials_collection.insert_one(record)
+    # Written directly: loan advice reads it back by id or input hash, possibly on another worker
+    financials_collection.insert_one(record)
+    update_financial_summary(user_id, [(crop_input, result)], record["created_at"])
+    return record["_id"]
+
+
+def save_crop_financials_many(user_id, crop_inputs: list, results: list, input_hashes: list) -> list:
+    """Save a batch of assessments with one insert_many and one summary update; returns their ids."""
+    created_at = datetime.utcnow()
+    records = [
+        {
+            "_id": ObjectId(),
+            "user_id": ObjectId(user_id),
+            "input": crop_input,
+            "input_hash": input_hash,
+            "output": result,
+            "created_at": created_at
+        }
+        for crop_input, result, input_hash in zip(crop_inputs, results, input_hashes)
+    ]
+    financials_collection.insert_many(records)
+    update_financial_summary(user_id, list(zip(crop_inputs, results)), created_at)
+    return [record["_id"] for record in records]
+
+
+def find_assessment(user_id, assessment_id: str = None, input_hash: str = None, max_age_minutes: int = None):
+    """
+    A stored assessment of the user, either by id or the most recent one
+    with the given input hash (no older than ``max_age_minutes``).
+    """
+    query = {"user_id": ObjectId(user_id)}
+    if assessment_id:
+        if not ObjectId.is_valid(assessment_id):
+            return None
+        query["_id"] = ObjectId(assessment_id)
+    elif input_hash:
+        query["input_hash"] = input_hash
+        if max_age_minutes:
+            query["created_at"] = {"$gte": datetime.utcnow() - timedelta(minutes=max_age_minutes)}
+    else:
+        return None
+
+    return financials_collection.find_one(query, {"output": 1}, sort=[("created_at", -1)])
+
+
+def find_assessments(user_id, assessment_ids) -> dict:
+    """The user's stored assessments with the given ids, keyed by id string (unknown or invalid ids are left out)."""
+    ids = [ObjectId(assessment_id) for assessment_id in set(assessment_ids) if ObjectId.is_valid(assessment_id)]
+    if not ids:
+        return {}
+    query = {"user_id": ObjectId(user_id), "_id": {"$in": ids}}
+    return {str(record["_id"]): record for record in financials_collection.find(query, {"output": 1})}
+
+
+def summary_document(user_id) -> dict:
+    """A user's summary computed from their stored assessments with one aggregation."""
+    window = config.FINANCIAL_SUMMARY_WINDOW
+    values = {field: {"$ifNull": [f"$output.{field}", 0]} for field in SUMMARY_FIELDS}
+    pipeline = [
+        {"$match": {"user_id": ObjectId(user_id)}},
+        {"$facet": {
+            "crops": [{"$group": {
+                "_id": "$input.cropType",
+                "count": {"$sum": 1},
+                "updated_at": {"$max": "$created_at"},
+                **{field: {"$sum": value} for field, value in values.items()},
+            }}],
+            "recent": [
+                {"$sort": {"created_at": -1}},
+                {"$limit": window},
+                {"$project": {"_id": 0, "cropType": "$input.cropType", "created_at": 1, **values}},
+            ],
+        }},
+    ]
+    result = next(financials_collection.aggregate(pipeline), {"crops": [], "recent": []})
+
+    document = {"count": 0, "totals": {field: 0.0 for field in SUMMARY_FIELDS}, "crops": {}, "recent": [], "updated_at": None}
+    for group in result["crops"]:
+        # Crop names differing only in case share one entry, as in summary_update
+        crop = document["crops"].setdefault(crop_key(group["_id"]), {
+            "cropType": group["_id"],
+            "count": 0,
+            "totals": {field: 0.0 for field in SUMMARY_FIELDS},
+        })
+        crop["count"] += group["count"]
+        document["count"] += group["count"]
+        for field in SUMMARY_FIELDS:
+            crop["totals"][field] += float(group[field] or 0)
+            document["totals"][field] += float(group[field] or 0)
+        if document["updated_at"] is None or group["updated_at"] > document["updated_at"]:
+            document["updated_at"] = group["updated_at"]
+    document["recent"] = [
+        {**{field: float(record.get(field) or 0) for field in SUMMARY_FIELDS}, "cropType": record.get("cropType"), "created_at": record.get("created_at")}
+        for record in reversed(result["recent"])
+    ]
+    return document
+
+
+def rebuild_financial_summary(user_id, attempts: int = 3):
+    """
+    Recompute a user's summary from their assessments and store it with a
+    single replace. The replace only applies if no save changed the summary
+    since it was read (its count is compared); afterwards the stored count is
+    checked against the assessments, and a mismatch (a save that landed
+    mid-rebuild) recomputes it.
+    """
+    summary = None
+    for _ in range(attempts):
+        current = summaries_collection.find_one({"_id": ObjectId(user_id)}, {"count": 1})
+        summary = {"_id": ObjectId(user_id), **summary_document(user_id), "version": SUMMARY_VERSION}
+        guard = {"_id": ObjectId(user_id), "count": current["count"] if current else {"$exists": False}}
+        try:
+            # A changed or concurrently created summary makes the upsert insert a duplicate _id
+            summaries_collection.replace_one(guard, summary, upsert=True)
+        except DuplicateKeyError:
+            continue
+        stored = summaries_collection.find_one({"_id": ObjectId(user_id)}, {"count": 1})
+        if stored and stored["count"] == financials_collection.count_documents({"user_id": ObjectId(user_id)}):
+            return summaries_collection.find_one({"_id": ObjectId(user_id)})
+    return summary
+
+
+def get_financial_summary(user_id):
+    """The user's summary document (one point lookup), rebuilt if missing or outdated."""
+    summary = summaries_collection.find_one({"_id": ObjectId(user_id)})
+    if summary is None or summary.get("version") != SUMMARY_VERSION:
+        summary = rebuild_financial_summary(user_id)
+    return summary if summary and summary["count"] else None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 class CropData(BaseModel):
     cropType: str
@@ -6,3 +6,26 @@ class CropData(BaseModel):
     salePricePerQuintal: float
     totalCost: float
     quantitySold: float
+
+
+class ParameterRange(BaseModel):
+    """Evenly spaced values from ``min`` to ``max`` (inclusive)."""
+    min: float
+    max: float
+    steps: int = Field(10, ge=1, le=1000)
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.max < self.min:
+            raise ValueError("max must be greater than or equal to min")
+        return self
+
+
+class SimulationRequest(BaseModel):
+    cropType: str
+    totalCost: float = Field(..., gt=0)
+    salePricePerQuintal: ParameterRange
+    quantitySold: ParameterRange
+    governmentSubsidy: ParameterRange = ParameterRange(min=0, max=0, steps=1)
+    # Return every scenario (columnar) in addition to the summaries
+    includeGrid: bool = False
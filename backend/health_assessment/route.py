@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
-from bson import ObjectId
+from fastapi import APIRouter, Body, Depends, HTTPException
+from typing import List
+import config
+from financials import input_hash
 from auth.dependencies import get_current_active_user
-from .model import CropData
-from .service import calculateFinancials
-from .database import save_crop_financial, financials_collection
+from .model import CropData, SimulationRequest
+from .service import calculateFinancials, calculateFinancialsBatch
+from .simulation import simulate
+from .database import save_crop_financial, save_crop_financials_many, get_financial_summary, SUMMARY_FIELDS
 
 router = APIRouter()
 
@@ -14,20 +17,53 @@ def calculateHealthAssessment(
 ):
     user_id = current_user["_id"]
     result = calculateFinancials(data)
-    save_crop_financial(user_id, data.dict(), result)
-    return result
+    assessment_id = save_crop_financial(user_id, data.dict(), result, input_hash(data))
+    # The id lets /loan_advice reuse this assessment instead of recomputing it
+    return {**result, "assessmentId": str(assessment_id)}
+
+
+@router.post("/health_assessment/batch")
+def calculateHealthAssessmentBatch(
+    items: List[CropData] = Body(..., min_length=1, max_length=config.BATCH_MAX_ITEMS),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Assess many farms in one request (e.g. all members of a cooperative).
+
+    Results are returned in input order and saved with a single insert_many.
+    """
+    user_id = current_user["_id"]
+    results = calculateFinancialsBatch(items)
+    assessment_ids = save_crop_financials_many(
+        user_id, [item.dict() for item in items], results, [input_hash(item) for item in items]
+    )
+    return [{**result, "assessmentId": str(assessment_id)} for result, assessment_id in zip(results, assessment_ids)]
+
+
+@router.post("/health_assessment/simulate")
+def simulateHealthAssessment(
+    request: SimulationRequest,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Evaluate a grid of sale price, quantity and subsidy scenarios at once.
+
+    Returns the profit distribution, break-even curves per subsidy level and
+    a sensitivity table; set includeGrid to also get every scenario.
+    Nothing is saved.
+    """
+    try:
+        return simulate(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/assessment-result-recents")
 def get_recent_assessment_averages(current_user: dict = Depends(get_current_active_user)):
     user_id = current_user["_id"]
 
-    recent_records = list(
-        financials_collection.find(
-            {"user_id": ObjectId(user_id)},
-            {"output.financialStability": 1, "output.cashFlow": 1}
-        ).sort("created_at", -1).limit(5)
-    )
+    summary = get_financial_summary(user_id)
+    recent_records = summary.get("recent", []) if summary else []
 
     if not recent_records:
         return {
@@ -36,18 +72,34 @@ def get_recent_assessment_averages(current_user: dict = Depends(get_current_acti
             "averageCashFlow": 0
         }
 
-    total_stability = 0
-    total_cash_flow = 0
-    count = 0
-
-    for record in recent_records:
-        output = record.get("output", {})
-        total_stability += output.get("financialStability", 0)
-        total_cash_flow += output.get("cashFlow", 0)
-        count += 1
+    count = len(recent_records)
+    total_stability = sum(record.get("financialStability", 0) for record in recent_records)
+    total_cash_flow = sum(record.get("cashFlow", 0) for record in recent_records)
 
     return {
         "averageFinancialStability": round(total_stability / count, 2) if count else 0,
         "averageCashFlow": round(total_cash_flow / count, 2) if count else 0,
         "recordsConsidered": count
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/assessment-summary")
+def get_assessment_summary(current_user: dict = Depends(get_current_active_user)):
+    """Lifetime and per-crop averages plus the most recent assessments."""
+    summary = get_financial_summary(current_user["_id"])
+    if not summary:
+        return {"count": 0, "lifetime": {}, "crops": [], "recent": []}
+
+    def averages(totals: dict, count: int) -> dict:
+        return {field: round(totals.get(field, 0) / count, 2) if count else 0 for field in SUMMARY_FIELDS}
+
+    return {
+        "count": summary["count"],
+        "lifetime": averages(summary.get("totals", {}), summary["count"]),
+        "crops": [
+            {"cropType": crop.get("cropType"), "count": crop["count"], "averages": averages(crop.get("totals", {}), crop["count"])}
+            for crop in summary.get("crops", {}).values()
+        ],
+        "recent": summary.get("recent", []),
+        "updated_at": summary.get("updated_at")
+    }
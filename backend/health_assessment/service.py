@@ -1,20 +1,11 @@
+from typing import List
+from financials import metrics_for, metrics_rows
 from .model import CropData
 
 def calculateFinancials(data: CropData):
-    totalIncome = data.quantitySold * data.salePricePerQuintal
+    return metrics_for(data)._asdict()
 
-    profit = totalIncome + data.governmentSubsidy - data.totalCost
 
-    financialStability = (profit / data.totalCost * 100) if data.totalCost != 0 else 0
-
-    cashFlow = (data.totalCost/ totalIncome * 100) if totalIncome != 0 else 0
-
-    totalExpense = data.totalCost
-
-    return {
-        "totalIncome": totalIncome,
-        "profit": profit,
-        "financialStability": financialStability,
-        "cashFlow": cashFlow,
-        "totalExpense": totalExpense,
-    }
+def calculateFinancialsBatch(items: List[CropData]) -> List[dict]:
+    """calculateFinancials for many inputs at once, computed column-wise with NumPy."""
+    return metrics_rows(items)
@@ -0,0 +1,128 @@
+"""
+What-if financial simulation for health assessments.
+
+Evaluates the calculateFinancials formulas over a grid of sale price,
+quantity and subsidy values with NumPy in one pass, then derives
+break-even curves and a sensitivity (tornado) table for the advisor.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import config
+from financials import financial_metrics_array
+from .model import ParameterRange, SimulationRequest
+
+
+def grid_values(parameter: ParameterRange) -> np.ndarray:
+    return np.linspace(parameter.min, parameter.max, parameter.steps)
+
+
+def _rounded(values: np.ndarray) -> List[Optional[float]]:
+    """JSON-safe list: rounded, with inf/NaN as None."""
+    values = np.round(np.asarray(values, dtype=float), 2).ravel()
+    result = values.astype(object)
+    result[~np.isfinite(values)] = None
+    return result.tolist()
+
+
+def break_even_curves(prices, quantities, subsidies, total_cost) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    For each subsidy level: the quantity needed to break even at each price,
+    and the price needed at each quantity (profit = 0).
+    """
+    shortfall = np.maximum(total_cost - subsidies, 0)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quantity_needed = np.where(prices > 0, shortfall / prices, np.inf)
+        price_needed = np.where(quantities > 0, shortfall / quantities, np.inf)
+    return {
+        "quantityByPrice": [
+            {"governmentSubsidy": float(s), "salePricePerQuintal": _rounded(prices), "breakEvenQuantity": _rounded(q)}
+            for s, q in zip(subsidies, quantity_needed)
+        ],
+        "priceByQuantity": [
+            {"governmentSubsidy": float(s), "quantitySold": _rounded(quantities), "breakEvenPrice": _rounded(p)}
+            for s, p in zip(subsidies, price_needed)
+        ],
+    }
+
+
+def sensitivity_table(request: SimulationRequest) -> List[Dict[str, Any]]:
+    """
+    Profit swing when each parameter moves across its range while the
+    others stay at the midpoint, plus the profit elasticity at the midpoint.
+    Rows are sorted by swing, largest first.
+    """
+    base = {
+        "salePricePerQuintal": (request.salePricePerQuintal.min + request.salePricePerQuintal.max) / 2,
+        "quantitySold": (request.quantitySold.min + request.quantitySold.max) / 2,
+        "governmentSubsidy": (request.governmentSubsidy.min + request.governmentSubsidy.max) / 2,
+    }
+    base_profit = base["quantitySold"] * base["salePricePerQuintal"] + base["governmentSubsidy"] - request.totalCost
+    # d(profit)/d(parameter) at the midpoint
+    gradient = {
+        "salePricePerQuintal": base["quantitySold"],
+        "quantitySold": base["salePricePerQuintal"],
+        "governmentSubsidy": 1.0,
+    }
+
+    rows = []
+    for name, value in base.items():
+        parameter: ParameterRange = getattr(request, name)
+        low = dict(base, **{name: parameter.min})
+        high = dict(base, **{name: parameter.max})
+        profit_low = float(financial_metrics_array(low["quantitySold"], low["salePricePerQuintal"], low["governmentSubsidy"], request.totalCost)["profit"])
+        profit_high = float(financial_metrics_array(high["quantitySold"], high["salePricePerQuintal"], high["governmentSubsidy"], request.totalCost)["profit"])
+        rows.append({
+            "parameter": name,
+            "low": parameter.min,
+            "high": parameter.max,
+            "profitAtLow": round(profit_low, 2),
+            "profitAtHigh": round(profit_high, 2),
+            "swing": round(abs(profit_high - profit_low), 2),
+            "elasticity": round(gradient[name] * value / base_profit, 4) if base_profit else None,
+        })
+    rows.sort(key=lambda row: row["swing"], reverse=True)
+    return rows
+
+
+def simulate(request: SimulationRequest) -> Dict[str, Any]:
+    prices = grid_values(request.salePricePerQuintal)
+    quantities = grid_values(request.quantitySold)
+    subsidies = grid_values(request.governmentSubsidy)
+
+    scenarios = prices.size * quantities.size * subsidies.size
+    if scenarios > config.SIMULATION_MAX_SCENARIOS:
+        raise ValueError(f"Grid has {scenarios} scenarios; the maximum is {config.SIMULATION_MAX_SCENARIOS}")
+
+    price, quantity, subsidy = np.meshgrid(prices, quantities, subsidies, indexing="ij")
+    results = financial_metrics_array(quantity, price, subsidy, request.totalCost)
+    # Constant across the grid
+    del results["totalExpense"]
+    profit = results["profit"]
+    p10, p50, p90 = np.percentile(profit, [10, 50, 90])
+
+    response = {
+        "cropType": request.cropType,
+        "scenarios": int(scenarios),
+        "profitableShare": round(float((profit > 0).mean()), 4),
+        "profit": {
+            "min": round(float(profit.min()), 2),
+            "max": round(float(profit.max()), 2),
+            "mean": round(float(profit.mean()), 2),
+            "p10": round(float(p10), 2),
+            "median": round(float(p50), 2),
+            "p90": round(float(p90), 2),
+        },
+        "breakEven": break_even_curves(prices, quantities, subsidies, request.totalCost),
+        "sensitivity": sensitivity_table(request),
+    }
+    if request.includeGrid:
+        response["grid"] = {
+            "salePricePerQuintal": _rounded(price),
+            "quantitySold": _rounded(quantity),
+            "governmentSubsidy": _rounded(subsidy),
+            **{name: _rounded(values) for name, values in results.items()},
+        }
+    return response
@@ -16,8 +16,15 @@ from security.https_middleware import HTTPSRedirectMiddleware, SecurityHeadersMi
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.errors import RateLimitExceeded
 from fastapi.responses import JSONResponse
+from model_store import warm_up
+from forcasting.services import load_models as load_forecasting_models
+from recommendation.cost_cutting_strategies.service import load_models as load_recommendation_models
+from chatbot.service import get_chat_service
+from storage import get_result_sink
+from admin.snapshots import get_dashboard_snapshots
 import os
 import sys
+import time
 import config
 
 app = FastAPI(
@@ -206,6 +213,55 @@ app.include_router(cost_cutting_strategies_router)
 app.include_router(chatbot_router)
 app.include_router(admin_router)
 
+@app.on_event("startup")
+def warm_up_components():
+    """
+    Load models and external clients before the first request is served.
+    
+    Nothing heavy happens at import time; each component is loaded lazily on
+    first use, and this hook only front-loads that cost for the server.
+    A per-component startup-time report is printed and kept on app.state.
+    """
+    if not config.WARM_UP_ON_STARTUP:
+        app.state.startup_report = {}
+        return
+    
+    start = time.perf_counter()
+    report = warm_up({
+        "forecasting_models": load_forecasting_models,
+        "recommendation_model": load_recommendation_models,
+        "chatbot_client": get_chat_service,
+    })
+    app.state.startup_report = report
+    
+    for component, elapsed_ms in report.items():
+        status_text = f"{elapsed_ms:.0f} ms" if elapsed_ms >= 0 else "failed"
+        print(f"Warm-up {component}: {status_text}")
+    print(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+@app.on_event("startup")
+def start_result_sink():
+    """Start the history write-behind sink; it first replays any spooled records."""
+    sink = get_result_sink()
+    if hasattr(sink, "start"):
+        sink.start()
+
+@app.on_event("shutdown")
+def stop_result_sink():
+    """Flush buffered history records, spooling (and fsyncing) any that cannot be written."""
+    get_result_sink().close()
+
+@app.on_event("startup")
+def start_dashboard_snapshots():
+    """Start recomputing the admin dashboard summaries in the background."""
+    if config.ADMIN_SNAPSHOT_ENABLED:
+        get_dashboard_snapshots().start()
+
+@app.on_event("shutdown")
+def stop_dashboard_snapshots():
+    if config.ADMIN_SNAPSHOT_ENABLED:
+        get_dashboard_snapshots().stop()
+
 @app.get(
     "/",
     summary="API Root",
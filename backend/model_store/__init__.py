@@ -0,0 +1,12 @@
+# Model store initialization
+from .registry import (
+    ModelBundle, get_active_bundle, get_model, preload_models, loaded_models,
+    warm_up, load_times, reload_models, model_status, available_versions
+)
+from .manifest import ModelIntegrityError
+
+__all__ = [
+    'ModelBundle', 'get_active_bundle', 'get_model', 'preload_models', 'loaded_models',
+    'warm_up', 'load_times', 'reload_models', 'model_status', 'available_versions',
+    'ModelIntegrityError'
+]
@@ -0,0 +1,21 @@
+"""
+Write manifest.json for a model bundle.
+
+Usage (from the backend directory):
+    python -m model_store <bundle_dir> --version <version>
+"""
+
+import argparse
+import json
+
+from model_store.manifest import write_manifest
+from model_store.registry import ARTIFACTS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write manifest.json for a model bundle")
+    parser.add_argument("bundle_dir", help="Directory holding the model artifacts")
+    parser.add_argument("--version", required=True, help="Version label of the bundle")
+    args = parser.parse_args()
+
+    written = write_manifest(args.bundle_dir, args.version, [file_name for file_name, _ in ARTIFACTS.values()])
+    print(json.dumps(written, indent=2))
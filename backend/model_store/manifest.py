@@ -0,0 +1,85 @@
+"""
+Model bundle manifests.
+
+A model bundle is a directory holding the model artifacts plus a
+``manifest.json`` describing them:
+
+    {
+        "version": "2025.06.19",
+        "created_at": "2025-06-19T00:00:00",
+        "artifacts": {
+            "demand_model.cbm": {"sha256": "..."},
+            ...
+        }
+    }
+
+Generate or refresh a manifest with:
+    python -m model_store <bundle_dir> --version <version>
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ModelIntegrityError(Exception):
+    """Raised when an artifact does not match the checksum in its manifest."""
+
+
+def compute_checksum(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(bundle_dir: str) -> Optional[Dict[str, Any]]:
+    """Return the bundle's manifest, or None if it has none."""
+    path = os.path.join(bundle_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify_artifact(bundle_dir: str, file_name: str, manifest: Optional[Dict[str, Any]]) -> str:
+    """
+    Check an artifact against its manifest entry and return its checksum.
+
+    Bundles without a manifest are accepted as-is (legacy flat model dir).
+    """
+    checksum = compute_checksum(os.path.join(bundle_dir, file_name))
+    if manifest is None:
+        return checksum
+
+    expected = manifest.get("artifacts", {}).get(file_name, {}).get("sha256")
+    if expected is None:
+        raise ModelIntegrityError(f"{file_name} is not listed in the manifest of {bundle_dir}")
+    if checksum != expected:
+        raise ModelIntegrityError(f"Checksum mismatch for {file_name} in {bundle_dir}")
+    return checksum
+
+
+def write_manifest(bundle_dir: str, version: str, file_names: Iterable[str]) -> Dict[str, Any]:
+    """Compute checksums for the given artifacts and write the manifest."""
+    manifest = {
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "artifacts": {
+            file_name: {"sha256": compute_checksum(os.path.join(bundle_dir, file_name))}
+            for file_name in sorted(file_names)
+        },
+    }
+    tmp_path = os.path.join(bundle_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, os.path.join(bundle_dir, MANIFEST_FILE))
+    return manifest
+
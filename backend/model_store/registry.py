@@ -0,0 +1,288 @@
+"""
+Process-wide registry for the trained model artifacts.
+
+Artifacts are grouped into versioned bundles (a directory plus its
+manifest.json, see model_store.manifest). The layout of MODEL_DIR is either
+
+    MODEL_DIR/<artifacts>, manifest.json            single bundle (default)
+
+or
+
+    MODEL_DIR/versions/<version>/<artifacts>, manifest.json
+    MODEL_DIR/CURRENT                                name of the active version
+
+Every artifact of the active bundle is loaded at most once per process and
+then shared read-only by all requests. When the API runs under gunicorn with
+``preload_app`` (see gunicorn.conf.py), ``preload_models`` is called in the
+master process before the workers are forked, so the native CatBoost/LightGBM
+model memory is shared copy-on-write between workers instead of being
+duplicated per worker.
+
+A new version is loaded completely in a background thread and only then
+swapped in by replacing a single reference. Requests that already hold the
+previous bundle finish with it; new requests see the new one.
+"""
+
+import gc
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from model_store.manifest import read_manifest, verify_artifact
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+UNVERSIONED = "unversioned"
+
+
+def _load_catboost_classifier(path: str):
+    from catboost import CatBoostClassifier
+    model = CatBoostClassifier()
+    model.load_model(path)
+    return model
+
+
+def _load_catboost_regressor(path: str):
+    from catboost import CatBoostRegressor
+    model = CatBoostRegressor()
+    model.load_model(path)
+    return model
+
+
+def _load_pickle(path: str):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# Artifact name -> (file name inside a bundle, loader)
+ARTIFACTS: Dict[str, tuple] = {
+    "demand": ("demand_model.cbm", _load_catboost_classifier),
+    "min_price": ("min_price_model.cbm", _load_catboost_regressor),
+    "max_price": ("max_price_model.cbm", _load_catboost_regressor),
+    "recommendation": ("recommendation_model.pkl", _load_pickle),
+    "encoders": ("encoders.pkl", _load_pickle),
+}
+
+
+class ModelBundle:
+    """One version of the model artifacts, loaded lazily and verified on load."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest = read_manifest(path)
+        self.version = (self.manifest or {}).get("version", UNVERSIONED)
+        self.checksums: Dict[str, str] = {}
+        self.load_times_ms: Dict[str, float] = {}
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Return the loaded artifact ``name``, loading it on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in ARTIFACTS:
+            raise KeyError(f"Unknown model artifact: {name}")
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            model = self._models.get(name)
+            if model is None:
+                file_name, loader = ARTIFACTS[name]
+                start = time.perf_counter()
+                self.checksums[file_name] = verify_artifact(self.path, file_name, self.manifest)
+                model = loader(os.path.join(self.path, file_name))
+                self.load_times_ms[name] = (time.perf_counter() - start) * 1000
+                self._models[name] = model
+        return model
+
+    def load_all(self) -> "ModelBundle":
+        for name in ARTIFACTS:
+            self.get(name)
+        return self
+
+    def loaded(self) -> Dict[str, bool]:
+        return {name: name in self._models for name in ARTIFACTS}
+
+
+_active_bundle: Optional[ModelBundle] = None
+_active_lock = threading.Lock()
+_current_pointer: Optional[str] = None
+_last_pointer_check = 0.0
+# A CURRENT pointer that failed to load; not retried until the file changes
+_bad_pointer: Optional[str] = None
+_reload_state: Dict[str, Any] = {"status": "idle", "target_version": None, "error": None, "finished_at": None}
+_reload_lock = threading.Lock()
+
+
+def _read_current_pointer() -> Optional[str]:
+    path = os.path.join(config.MODEL_DIR, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip() or None
+
+
+def _bundle_path(version: Optional[str]) -> str:
+    if version is None:
+        return config.MODEL_DIR
+    path = os.path.join(config.MODEL_DIR, VERSIONS_DIR, version)
+    if not os.path.isdir(path):
+        raise ValueError(f"Model version '{version}' not found")
+    return path
+
+
+def _maybe_follow_pointer() -> None:
+    """
+    Pick up a version switch made by another worker process.
+
+    Reload requests only reach one worker; it records the new version in
+    MODEL_DIR/CURRENT, which the other workers check at most every
+    MODEL_VERSION_CHECK_SECONDS and then reload in the background. A
+    pointer naming a missing version is reported once and ignored (the
+    active bundle keeps serving) until CURRENT changes again.
+    """
+    global _last_pointer_check, _bad_pointer
+    now = time.monotonic()
+    if now - _last_pointer_check < config.MODEL_VERSION_CHECK_SECONDS:
+        return
+    _last_pointer_check = now
+
+    try:
+        pointer = _read_current_pointer()
+    except OSError as e:
+        print(f"Reading the model version pointer failed: {e}")
+        return
+    if pointer == _current_pointer or pointer == _bad_pointer or _reload_state["status"] == "loading":
+        return
+    try:
+        reload_models(pointer, persist=False)
+    except ValueError as e:
+        _bad_pointer = pointer
+        print(f"Ignoring model version pointer {pointer!r}, keeping the active bundle: {e}")
+
+
+def get_active_bundle() -> ModelBundle:
+    """Return the bundle new requests should use."""
+    global _active_bundle, _current_pointer
+    if _active_bundle is None:
+        with _active_lock:
+            if _active_bundle is None:
+                _current_pointer = _read_current_pointer()
+                _active_bundle = ModelBundle(_bundle_path(_current_pointer))
+    else:
+        _maybe_follow_pointer()
+    return _active_bundle
+
+
+def get_model(name: str) -> Any:
+    """Return the artifact ``name`` from the active bundle."""
+    return get_active_bundle().get(name)
+
+
+def _swap_in(version: Optional[str], persist: bool) -> None:
+    global _active_bundle, _current_pointer
+    try:
+        bundle = ModelBundle(_bundle_path(version)).load_all()
+        if persist:
+            pointer_path = os.path.join(config.MODEL_DIR, CURRENT_FILE)
+            tmp_path = pointer_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(version or "")
+            os.replace(tmp_path, pointer_path)
+        # Single reference assignment: in-flight requests keep the old bundle
+        _active_bundle = bundle
+        _current_pointer = version
+        _reload_state.update(status="idle", error=None)
+        print(f"Model bundle {bundle.version} is now active")
+    except Exception as e:
+        _reload_state.update(status="failed", error=str(e))
+        print(f"Model reload to {version or 'default bundle'} failed: {e}")
+    finally:
+        _reload_state["finished_at"] = datetime.utcnow()
+
+
+def reload_models(version: Optional[str] = None, persist: bool = True) -> Dict[str, Any]:
+    """
+    Load ``version`` (or the default bundle when None) in the background and
+    swap it in once every artifact is loaded and verified.
+
+    Returns the reload state; a reload already in progress is not restarted.
+    """
+    with _reload_lock:
+        if _reload_state["status"] == "loading":
+            return dict(_reload_state)
+        _bundle_path(version)  # fail fast on unknown versions
+        _reload_state.update(status="loading", target_version=version, error=None, finished_at=None)
+        threading.Thread(target=_swap_in, args=(version, persist), daemon=True).start()
+        return dict(_reload_state)
+
+
+def available_versions() -> List[str]:
+    versions_dir = os.path.join(config.MODEL_DIR, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        entry for entry in os.listdir(versions_dir)
+        if os.path.isdir(os.path.join(versions_dir, entry))
+    )
+
+
+def model_status() -> Dict[str, Any]:
+    """Describe the active bundle and any reload in progress."""
+    bundle = get_active_bundle()
+    return {
+        "active_version": bundle.version,
+        "path": bundle.path,
+        "loaded": bundle.loaded(),
+        "checksums": dict(bundle.checksums),
+        "available_versions": available_versions(),
+        "reload": dict(_reload_state),
+    }
+
+
+def preload_models() -> None:
+    """
+    Load every artifact and freeze the resulting heap.
+
+    Call this before forking workers. ``gc.freeze`` moves the loaded objects
+    to the permanent generation so the garbage collector in the children
+    never touches (and therefore never copies) their pages.
+    """
+    get_active_bundle().load_all()
+    gc.collect()
+    gc.freeze()
+
+
+def loaded_models() -> Dict[str, bool]:
+    """Report which artifacts of the active bundle are resident in this process."""
+    return get_active_bundle().loaded()
+
+
+def warm_up(components: Dict[str, Callable[[], Any]]) -> Dict[str, float]:
+    """
+    Run each component's warm-up hook and return its duration in milliseconds.
+
+    A failing component is reported with a negative duration and does not
+    stop the others from warming up; it will be retried on first use.
+    """
+    report = {}
+    for component, hook in components.items():
+        start = time.perf_counter()
+        try:
+            hook()
+            report[component] = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            print(f"Warm-up failed for {component}: {e}")
+            report[component] = -1.0
+    return report
+
+
+def load_times() -> Dict[str, float]:
+    """Milliseconds spent loading each artifact of the active bundle."""
+    return dict(get_active_bundle().load_times_ms)
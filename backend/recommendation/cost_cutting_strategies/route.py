@@ -1,5 +1,6 @@
 import os
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from .model import RecommendationInput, RecommendationOutput
 from .service import make_prediction
@@ -20,7 +21,8 @@ async def predict_recommendation(input_data: RecommendationInput):
     
     try:
         serilized_data = data.model_dump()
-        result = make_prediction(serilized_data, language)
+        # Model inference and translation (Mongo cache, Google) are blocking
+        result = await run_in_threadpool(make_prediction, serilized_data, language)
         return {"success": True, "data": result}
     except Exception as e:
         raise HTTPException(
@@ -1,21 +1,17 @@
 import pandas as pd
-import pickle
-import os
+from model_store import ModelBundle, get_active_bundle
 
+from translation import translate_text_or_original
 from .utils import translations
-basemodel_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "../..", "model")
-basemodel_path = os.path.abspath(basemodel_path)  # Ensure the path is absolute
 
-def make_prediction(input_data: dict, language: str = "en"):
-    recommendation_model_path = basemodel_path + '/recommendation_model.pkl'
-    encoders = basemodel_path + '/encoders.pkl'
-
-    # Load model and encoders
-    with open(recommendation_model_path, 'rb') as f:
-        model = pickle.load(f)
+def load_models(bundle: ModelBundle = None):
+    """Load the recommendation model and encoders (no-op once resident)."""
+    bundle = bundle or get_active_bundle()
+    return bundle.get("recommendation"), bundle.get("encoders")
 
-    with open(encoders, 'rb') as f:
-        encoders = pickle.load(f) 
+def make_prediction(input_data: dict, language: str = "en"):
+    # Model and encoders are loaded once per process and shared across requests
+    model, encoders = load_models()
 
     # Create a DataFrame for prediction
     input_df = pd.DataFrame([input_data])
@@ -45,6 +41,11 @@ def make_prediction(input_data: dict, language: str = "en"):
 
     # For different languages, use the translations dictionary
     if language != "en":
-        recommendation = translations.get(recommendation, {}).get(language, recommendation)
+        # Fall back to the cached translator for texts without a curated translation
+        translated = translations.get(recommendation, {}).get(language)
+        if not translated:
+            # Translation is best effort; answer in English rather than fail
+            translated = translate_text_or_original(recommendation, "en", language)
+        recommendation = translated or recommendation
 
     return {"recommendation": recommendation}
\ No newline at end of file
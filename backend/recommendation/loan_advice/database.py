@@ -1,14 +1,65 @@
 from datetime import datetime
 from bson import ObjectId
 from auth.database import db  # shared Mongo client
+from storage import get_result_sink, get_collection
 
-loan_advice_collection = db.loan_advice_recommendations
+loan_advice_collection = get_collection("loan_advice", db)
 
-def save_loan_recommendation(user_id, crop_input: dict, recommendation_result: dict):
+def save_loan_recommendation(user_id, crop_input: dict, recommendation_result: dict, input_hash: str = None):
     record = {
         "user_id": ObjectId(user_id),
         "input": crop_input,
+        "input_hash": input_hash,
         "output": recommendation_result,
         "created_at": datetime.utcnow()
     }
-    return loan_advice_collection.insert_one(record)
+    # History only: written in the background by the result sink
+    return get_result_sink().submit(loan_advice_collection.name, record)
+
+
+def _assessment_advice_record(user_id, assessment_id: ObjectId, recommendation_result: dict, created_at: datetime) -> dict:
+    # Keyed by the assessment id, so the sink drops repeated advice for the
+    # same assessment as a duplicate instead of adding another document
+    return {
+        "_id": assessment_id,
+        "user_id": ObjectId(user_id),
+        "assessment_id": assessment_id,
+        "output": recommendation_result,
+        "created_at": created_at
+    }
+
+
+def save_loan_recommendation_for_assessment(user_id, assessment_id: ObjectId, recommendation_result: dict):
+    """
+    Record advice given from a stored assessment. The inputs live on the
+    assessment, and repeated requests for the same assessment do not add
+    another document.
+    """
+    record = _assessment_advice_record(user_id, assessment_id, recommendation_result, datetime.utcnow())
+    return get_result_sink().submit(loan_advice_collection.name, record)
+
+
+def save_loan_recommendations_for_assessments(user_id, assessment_results: list):
+    """save_loan_recommendation_for_assessment for many (assessment_id, result) pairs."""
+    created_at = datetime.utcnow()
+    records = [
+        _assessment_advice_record(user_id, assessment_id, recommendation_result, created_at)
+        for assessment_id, recommendation_result in assessment_results
+    ]
+    return get_result_sink().submit_many(loan_advice_collection.name, records)
+
+
+def save_loan_recommendations_many(user_id, crop_inputs: list, recommendation_results: list, input_hashes: list):
+    """Save a batch of loan recommendations with one insert_many."""
+    created_at = datetime.utcnow()
+    records = [
+        {
+            "user_id": ObjectId(user_id),
+            "input": crop_input,
+            "input_hash": data_hash,
+            "output": recommendation_result,
+            "created_at": created_at
+        }
+        for crop_input, recommendation_result, data_hash in zip(crop_inputs, recommendation_results, input_hashes)
+    ]
+    return get_result_sink().submit_many(loan_advice_collection.name, records)
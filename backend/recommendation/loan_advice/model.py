@@ -8,6 +8,8 @@ class CropData(BaseModel):
     salePricePerQuintal: float = 0
     totalCost: float = 0
     quantitySold: float = 0
+    # Id returned by /health_assessment; when given, its stored results are used
+    assessmentId: Optional[str] = None
 
 
 class AssessmentResult(CropData):
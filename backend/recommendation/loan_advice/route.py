@@ -1,17 +1,111 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from typing import List
+import config
 from .model import CropData
-from .service import makeRecommendations
-from .database import save_loan_recommendation
+from financials import input_hash
+from health_assessment.database import find_assessment, find_assessments
+from .service import makeRecommendations, makeRecommendationsBatch, recommendationFor
+from .database import (
+    save_loan_recommendation, save_loan_recommendation_for_assessment,
+    save_loan_recommendations_for_assessments, save_loan_recommendations_many
+)
 from auth.dependencies import get_current_active_user
+from translation import translate_text_or_original
 
 router = APIRouter()
 
+SUPPORTED_LANGUAGES = ["en", "am", "om", "ti"]
+
+def check_language(language: str):
+    if language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail="Language not supported. Supported languages are: en, am, om, ti"
+        )
+
 @router.post("/loan_advice")
 def makeRecommendation(
     data: CropData,
+    language: str = Query("en", description="Language of the recommendation text (en, am, om, ti)"),
     current_user: dict = Depends(get_current_active_user)
 ):
+    check_language(language)
     user_id = current_user["_id"]
-    result = makeRecommendations(data)
-    save_loan_recommendation(user_id, data.dict(), result)
+    data_hash = input_hash(data)
+
+    # Serve from a stored assessment (given by id, or a recent one with the
+    # same numbers) instead of recomputing it
+    assessment = find_assessment(
+        user_id,
+        assessment_id=data.assessmentId,
+        input_hash=None if data.assessmentId else data_hash,
+        max_age_minutes=config.LOAN_ADVICE_REUSE_MINUTES
+    )
+    if data.assessmentId and assessment is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
+    if assessment:
+        output = assessment["output"]
+        result = {"recommendation": recommendationFor(output["financialStability"], output["cashFlow"])}
+        save_loan_recommendation_for_assessment(user_id, assessment["_id"], result)
+        result = {**result, "assessmentId": str(assessment["_id"])}
+    else:
+        result = makeRecommendations(data)
+        save_loan_recommendation(user_id, data.dict(exclude={"assessmentId"}), result, data_hash)
+    if language != "en":
+        # The recommendation texts are fixed strings, so these are almost always
+        # cache hits; if translation fails the advice is given in English
+        result = {**result, "recommendation": translate_text_or_original(result["recommendation"], "en", language)}
     return result
+
+
+@router.post("/loan_advice/batch")
+def makeRecommendationBatch(
+    items: List[CropData] = Body(..., min_length=1, max_length=config.BATCH_MAX_ITEMS),
+    language: str = Query("en", description="Language of the recommendation text (en, am, om, ti)"),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Loan advice for many farms in one request (e.g. all members of a cooperative).
+
+    Items with an ``assessmentId`` use that stored assessment, like the
+    single endpoint; the rest are computed column-wise. Results are returned
+    in input order and queued for the result sink.
+    """
+    check_language(language)
+    user_id = current_user["_id"]
+    assessments = find_assessments(user_id, [item.assessmentId for item in items if item.assessmentId])
+    missing = [index for index, item in enumerate(items) if item.assessmentId and item.assessmentId not in assessments]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Assessment not found for items {missing}")
+
+    computed_items = [item for item in items if not item.assessmentId]
+    computed = makeRecommendationsBatch(computed_items) if computed_items else []
+    computed_results = iter(computed)
+    results = []
+    linked = []
+    for item in items:
+        if item.assessmentId:
+            assessment = assessments[item.assessmentId]
+            output = assessment["output"]
+            result = {"recommendation": recommendationFor(output["financialStability"], output["cashFlow"])}
+            linked.append((assessment["_id"], result))
+            result = {**result, "assessmentId": item.assessmentId}
+        else:
+            result = next(computed_results)
+        results.append(result)
+
+    if computed_items:
+        save_loan_recommendations_many(
+            user_id,
+            [item.dict(exclude={"assessmentId"}) for item in computed_items],
+            computed,
+            [input_hash(item) for item in computed_items]
+        )
+    if linked:
+        save_loan_recommendations_for_assessments(user_id, linked)
+    if language != "en":
+        # Only two distinct texts, so translate each once
+        translated = {text: translate_text_or_original(text, "en", language) for text in {r["recommendation"] for r in results}}
+        results = [{**r, "recommendation": translated[r["recommendation"]]} for r in results]
+    return results
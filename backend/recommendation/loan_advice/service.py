@@ -1,38 +1,54 @@
+from typing import List
+from financials import financial_metrics_array, input_columns, metrics_for
 from .model import CropData, AssessmentResult
 
 
 def calculateFinancials(data: CropData) -> AssessmentResult:
-    total_income = data.quantitySold * data.salePricePerQuintal
-    profit = total_income + data.governmentSubsidy - data.totalCost
-    financial_stability = (profit / data.totalCost * 100) if data.totalCost != 0 else 0
-    cash_flow = (data.totalCost / total_income * 100) if total_income != 0 else 0
-    total_expense = data.totalCost
-
-    return AssessmentResult(
-        **data.dict(),
-        financialStability=financial_stability,
-        cashFlow=cash_flow,
+    metrics = metrics_for(data)
+    # Inputs were validated with the request; skip re-validating them here
+    return AssessmentResult.model_construct(
+        **data.model_dump(),
+        financialStability=metrics.financialStability,
+        cashFlow=metrics.cashFlow,
     )
 
 
-def makeRecommendations(data: CropData) -> dict:
-    result = calculateFinancials(data)
-
-    if result.financialStability >= 50 and result.cashFlow <= 50:
-        recommendation = (
-            "Your financial stability is in a strong position, and your cash flow indicates healthy business operations. "
-            "At this stage, it would be beneficial to reinvest your profits into expanding your business, optimizing production, or improving efficiency. "
-            "Since you are not heavily reliant on external funding, maintaining a financial buffer for unexpected costs is advisable. "
-            "Additionally, exploring new opportunities such as expanding your market reach or diversifying your product line could further strengthen your position."
-        )
-    else:
-        recommendation = (
-            "Your financial stability and cash flow are currently not at an optimal level, which may pose challenges in sustaining operations. "
-            "It would be wise to explore funding options, such as applying for a business loan or seeking government grants, to support your financial needs. "
-            "Additionally, focusing on cost-cutting measures, improving operational efficiency, and increasing revenue streams through better pricing strategies or higher sales volumes "
-            "can help stabilize your finances. Careful financial planning and seeking expert advice could also contribute to long-term business sustainability."
-        )
+# Advice for a strong position (stability >= 50 and cash flow <= 50) and for everyone else
+STRONG_POSITION_RECOMMENDATION = (
+    "Your financial stability is in a strong position, and your cash flow indicates healthy business operations. "
+    "At this stage, it would be beneficial to reinvest your profits into expanding your business, optimizing production, or improving efficiency. "
+    "Since you are not heavily reliant on external funding, maintaining a financial buffer for unexpected costs is advisable. "
+    "Additionally, exploring new opportunities such as expanding your market reach or diversifying your product line could further strengthen your position."
+)
+WEAK_POSITION_RECOMMENDATION = (
+    "Your financial stability and cash flow are currently not at an optimal level, which may pose challenges in sustaining operations. "
+    "It would be wise to explore funding options, such as applying for a business loan or seeking government grants, to support your financial needs. "
+    "Additionally, focusing on cost-cutting measures, improving operational efficiency, and increasing revenue streams through better pricing strategies or higher sales volumes "
+    "can help stabilize your finances. Careful financial planning and seeking expert advice could also contribute to long-term business sustainability."
+)
+
+
+def recommendationFor(financial_stability: float, cash_flow: float) -> str:
+    if financial_stability >= 50 and cash_flow <= 50:
+        return STRONG_POSITION_RECOMMENDATION
+    return WEAK_POSITION_RECOMMENDATION
+
 
+def makeRecommendations(data: CropData) -> dict:
+    metrics = metrics_for(data)
     return {
-        "recommendation": recommendation,
+        "recommendation": recommendationFor(metrics.financialStability, metrics.cashFlow),
     }
+
+
+def makeRecommendationsBatch(items: List[CropData]) -> List[dict]:
+    """makeRecommendations for many inputs, with the metrics computed column-wise."""
+    columns = input_columns(items)
+    metrics = financial_metrics_array(
+        columns["quantitySold"], columns["salePricePerQuintal"], columns["governmentSubsidy"], columns["totalCost"]
+    )
+    strong = (metrics["financialStability"] >= 50) & (metrics["cashFlow"] <= 50)
+    return [
+        {"recommendation": STRONG_POSITION_RECOMMENDATION if is_strong else WEAK_POSITION_RECOMMENDATION}
+        for is_strong in strong.tolist()
+    ]
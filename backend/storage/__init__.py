@@ -0,0 +1,9 @@
+# Storage module initialization
+from .result_sink import ResultSink, DirectSink, get_result_sink
+from .collections import COLLECTIONS, CollectionSpec, get_collection, user_id_value, user_filter, ensure_collection_indexes
+
+__all__ = [
+    'ResultSink', 'DirectSink', 'get_result_sink',
+    'COLLECTIONS', 'CollectionSpec', 'get_collection', 'user_id_value', 'user_filter',
+    'ensure_collection_indexes',
+]
@@ -0,0 +1,121 @@
+"""
+Registry of the per-user collections shared by the services and the admin
+dashboard.
+
+Each entry records the collection name, how ``user_id`` is stored, which
+field timestamps the record and the compound indexes the services and the
+admin pipelines rely on. Write paths get their collection from here and
+admin queries build their filters from here, so both agree on names and
+types.
+
+History records (predictions, assessments, advice) store ``user_id`` as an
+ObjectId and ``created_at``; expenses and activity logs keep the string
+``user_id`` their API models expose.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+import config
+
+
+class CollectionSpec(NamedTuple):
+    name: str
+    user_id_type: type = ObjectId
+    time_field: str = "created_at"
+    # (keys, create_index options)
+    indexes: Tuple[Tuple[List[tuple], Dict[str, Any]], ...] = ()
+
+
+def _by_user_and_time(time_field: str = "created_at"):
+    return ([("user_id", ASCENDING), (time_field, DESCENDING)], {})
+
+
+COLLECTIONS: Dict[str, CollectionSpec] = {
+    "predictions": CollectionSpec(
+        "crop_forecasting_predictions",
+        indexes=(_by_user_and_time(),),
+    ),
+    "financial_assessments": CollectionSpec(
+        "financial_assessments",
+        indexes=(
+            _by_user_and_time(),
+            # Looked up by input hash when giving loan advice
+            ([("user_id", ASCENDING), ("input_hash", ASCENDING), ("created_at", DESCENDING)], {}),
+        ),
+    ),
+    "loan_advice": CollectionSpec(
+        "loan_advice_recommendations",
+        indexes=(
+            _by_user_and_time(),
+            ([("user_id", ASCENDING), ("assessment_id", ASCENDING)], {}),
+        ),
+    ),
+    "cost_cutting": CollectionSpec(
+        "cost_cutting_strategies",
+        indexes=(_by_user_and_time(),),
+    ),
+    "expenses": CollectionSpec(
+        "expenses",
+        user_id_type=str,
+        time_field="date",
+        indexes=(
+            # (user_id, date, _id) serves paginated expense listing and the
+            # analytics; the cropType variant serves listing filtered by crop
+            ([("user_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], {}),
+            ([("user_id", ASCENDING), ("cropType", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], {}),
+            # Delta sync by per-user version; tombstones expire after the retention period
+            ([("user_id", ASCENDING), ("version", ASCENDING)], {}),
+            ([("deleted_at", ASCENDING)], {"expireAfterSeconds": config.EXPENSE_TOMBSTONE_TTL_DAYS * 24 * 3600}),
+        ),
+    ),
+    "activity_logs": CollectionSpec(
+        "activity_logs",
+        user_id_type=str,
+        time_field="timestamp",
+        indexes=(
+            _by_user_and_time("timestamp"),
+            ([("action", ASCENDING)], {}),
+        ),
+    ),
+}
+
+
+def get_collection(key: str, database=None):
+    """The registered collection ``key`` in ``database`` (the shared client's database by default)."""
+    if database is None:
+        from auth.database import db as database
+    return database[COLLECTIONS[key].name]
+
+
+def user_id_value(key: str, user_id):
+    """``user_id`` in the type the collection stores."""
+    if COLLECTIONS[key].user_id_type is ObjectId:
+        return user_id if isinstance(user_id, ObjectId) else ObjectId(user_id)
+    return str(user_id)
+
+
+def user_filter(key: str, user_ids: Iterable, time_query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Match on the given users (and optionally a time range such as
+    ``{"$gte": start}``) on the registered user and time fields.
+    """
+    user_ids = list(user_ids)
+    spec = COLLECTIONS[key]
+    if len(user_ids) == 1:
+        query = {"user_id": user_id_value(key, user_ids[0])}
+    else:
+        query = {"user_id": {"$in": [user_id_value(key, user_id) for user_id in user_ids]}}
+    if time_query:
+        query[spec.time_field] = time_query
+    return query
+
+
+def ensure_collection_indexes(database=None) -> None:
+    """Create the registered indexes of every collection."""
+    for key, spec in COLLECTIONS.items():
+        collection = get_collection(key, database)
+        for keys, options in spec.indexes:
+            collection.create_index(keys, **options)
@@ -0,0 +1,62 @@
+"""
+Backfill existing documents to the field names and types in the collection
+registry, then create the registered indexes.
+
+- ``user_id`` is converted to the registered type (ObjectId for history
+  records, string for expenses and activity logs)
+- records that only carry the legacy ``timestamp`` get the registered time
+  field copied from it
+
+Every step only touches documents that still need it, so the migration can
+be re-run safely.
+
+Usage (from the backend directory):
+    python -m storage.migrations
+"""
+
+from typing import Any, Dict
+
+from bson import ObjectId
+
+from storage.collections import COLLECTIONS, ensure_collection_indexes, get_collection
+
+OBJECT_ID_PATTERN = "^[0-9a-fA-F]{24}$"
+
+
+def normalize_user_ids(collection, user_id_type: type) -> int:
+    """Convert ``user_id`` values stored with the wrong type; returns documents changed."""
+    if user_id_type is ObjectId:
+        query = {"user_id": {"$type": "string", "$regex": OBJECT_ID_PATTERN}}
+        converted = {"$toObjectId": "$user_id"}
+    else:
+        query = {"user_id": {"$type": "objectId"}}
+        converted = {"$toString": "$user_id"}
+    return collection.update_many(query, [{"$set": {"user_id": converted}}]).modified_count
+
+
+def backfill_time_field(collection, time_field: str, legacy_field: str = "timestamp") -> int:
+    """Copy ``legacy_field`` into ``time_field`` where only the legacy field is set."""
+    if time_field == legacy_field:
+        return 0
+    query = {time_field: {"$exists": False}, legacy_field: {"$exists": True}}
+    return collection.update_many(query, [{"$set": {time_field: f"${legacy_field}"}}]).modified_count
+
+
+def migrate(database=None) -> Dict[str, Dict[str, Any]]:
+    """Bring every registered collection in line with the registry; returns per-collection counts."""
+    report = {}
+    for key, spec in COLLECTIONS.items():
+        collection = get_collection(key, database)
+        report[spec.name] = {
+            "user_ids_converted": normalize_user_ids(collection, spec.user_id_type),
+            "time_field_backfilled": backfill_time_field(collection, spec.time_field),
+        }
+    ensure_collection_indexes(database)
+    return report
+
+
+if __name__ == "__main__":
+    for name, counts in migrate().items():
+        print(f"{name}: {counts['user_ids_converted']} user ids converted, "
+              f"{counts['time_field_backfilled']} time fields backfilled")
+    print("Indexes created")
@@ -0,0 +1,261 @@
+"""
+Write-behind sink for history records (predictions, loan advice).
+
+Requests hand their record to the sink and return immediately; a background
+thread writes the buffered records with one insert_many per collection when
+RESULT_SINK_BATCH_SIZE records are waiting or every RESULT_SINK_FLUSH_SECONDS.
+
+Records get their ObjectId when submitted, so callers can return ids right
+away and re-inserting a record is harmless (duplicates are ignored). Records
+that cannot be written (database unavailable, or still buffered at shutdown)
+are appended to a local JSONL spool file and fsynced; spooled records are
+replayed on the next start and after the next successful flush.
+
+Buffered records are only visible to this process until they are flushed,
+so records that are read back by id or hash (financial assessments) are
+written directly instead of through the sink.
+"""
+
+import glob
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+import config
+
+DUPLICATE_KEY = 11000
+REPLAYING_SUFFIX = ".replaying-"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class ResultSink:
+    def __init__(
+        self,
+        db,
+        batch_size: int = 200,
+        flush_seconds: float = 1.0,
+        spool_dir: Optional[str] = None,
+        fsync: bool = True,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.spool_dir = spool_dir
+        self.fsync = fsync
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._counters = {"submitted": 0, "written": 0, "flushes": 0, "spooled": 0, "replayed": 0, "errors": 0}
+
+    # --- Submitting ---
+
+    def submit(self, collection: str, document: dict) -> ObjectId:
+        """Queue one record for ``collection``; returns its _id."""
+        return self.submit_many(collection, [document])[0]
+
+    def submit_many(self, collection: str, documents: List[dict]) -> List[ObjectId]:
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        with self._lock:
+            self._buffer.extend((collection, document) for document in documents)
+            self._counters["submitted"] += len(documents)
+            full = len(self._buffer) >= self.batch_size
+        self.start()
+        if full:
+            self._wake.set()
+        return [document["_id"] for document in documents]
+
+    # --- Background flushing ---
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopped.clear()
+                    self._thread = threading.Thread(target=self._run, name="result-sink", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        self.replay_spool()
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def _take(self) -> List[tuple]:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        return batch
+
+    def flush(self) -> int:
+        """Write everything buffered; spool what cannot be written. Returns records written."""
+        batch = self._take()
+        if not batch:
+            return 0
+
+        by_collection: Dict[str, List[dict]] = {}
+        for collection, document in batch:
+            by_collection.setdefault(collection, []).append(document)
+
+        written = 0
+        failed = []
+        for collection, documents in by_collection.items():
+            try:
+                written += self._insert(collection, documents)
+            except PyMongoError as e:
+                print(f"Result sink write to {collection} failed: {e}")
+                self._counters["errors"] += 1
+                failed.extend((collection, document) for document in documents)
+
+        self._counters["flushes"] += 1
+        self._counters["written"] += written
+        if failed:
+            self._spool(failed)
+        elif self.spool_dir and self._spool_files():
+            # The database is reachable again; catch up on spooled records
+            self.replay_spool()
+        return written
+
+    def _insert(self, collection: str, documents: List[dict]) -> int:
+        try:
+            return len(self.db[collection].insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+            # Already written earlier (e.g. replayed from the spool)
+            return e.details.get("nInserted", 0)
+
+    # --- Spool file ---
+
+    def _spool_path(self) -> str:
+        return os.path.join(self.spool_dir, f"results-{os.getpid()}.jsonl")
+
+    def _spool_files(self) -> List[str]:
+        """Spool files to replay, including claims left behind by dead processes."""
+        files = glob.glob(os.path.join(self.spool_dir, "results-*.jsonl"))
+        for path in glob.glob(os.path.join(self.spool_dir, f"results-*.jsonl{REPLAYING_SUFFIX}*")):
+            pid = path.rsplit(REPLAYING_SUFFIX, 1)[1]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                files.append(path)
+        return files
+
+    def _spool(self, records: List[tuple]) -> None:
+        if not self.spool_dir:
+            print(f"Result sink dropped {len(records)} records (no spool directory configured)")
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with open(self._spool_path(), "a", encoding="utf-8") as f:
+            for collection, document in records:
+                f.write(json_util.dumps({"collection": collection, "document": document}) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._counters["spooled"] += len(records)
+
+    def replay_spool(self) -> int:
+        """Insert records spooled by this or earlier processes, then remove the spool files."""
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return 0
+        replayed = 0
+        for spooled in self._spool_files():
+            # Claim the file so another worker does not replay it too; a claim
+            # orphaned by a crashed worker is re-claimed under this pid
+            path = spooled.split(REPLAYING_SUFFIX, 1)[0]
+            claimed = f"{path}{REPLAYING_SUFFIX}{os.getpid()}"
+            try:
+                os.rename(spooled, claimed)
+            except OSError:
+                continue
+
+            by_collection: Dict[str, List[dict]] = {}
+            with open(claimed, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json_util.loads(line)
+                        by_collection.setdefault(record["collection"], []).append(record["document"])
+            try:
+                for collection, documents in by_collection.items():
+                    for start in range(0, len(documents), self.batch_size):
+                        replayed += self._insert(collection, documents[start:start + self.batch_size])
+            except PyMongoError as e:
+                print(f"Result sink replay of {path} failed, will retry: {e}")
+                os.rename(claimed, path)
+                break
+            os.remove(claimed)
+        self._counters["replayed"] += replayed
+        return replayed
+
+    # --- Shutdown ---
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the flusher, write what is buffered and spool anything left."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        leftover = self._take()
+        if leftover:
+            self._spool(leftover)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {**self._counters, "buffered": buffered}
+
+
+class DirectSink:
+    """Synchronous stand-in used when RESULT_SINK_ENABLED is off: one insert per call."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def submit(self, collection: str, document: dict) -> ObjectId:
+        document.setdefault("_id", ObjectId())
+        self.db[collection].insert_one(document)
+        return document["_id"]
+
+    def submit_many(self, collection: str, documents: List[dict]) -> List[ObjectId]:
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        self.db[collection].insert_many(documents)
+        return [document["_id"] for document in documents]
+
+    def close(self, timeout: float = 10.0) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": False}
+
+
+@lru_cache(maxsize=1)
+def get_result_sink():
+    """Process-wide result sink (a direct writer when the sink is disabled)."""
+    from auth.database import db
+    if not config.RESULT_SINK_ENABLED:
+        return DirectSink(db)
+    return ResultSink(
+        db,
+        batch_size=config.RESULT_SINK_BATCH_SIZE,
+        flush_seconds=config.RESULT_SINK_FLUSH_SECONDS,
+        spool_dir=config.RESULT_SINK_SPOOL_DIR or None,
+        fsync=config.RESULT_SINK_FSYNC,
+    )
@@ -0,0 +1,12 @@
+# Translation module initialization
+from .cache import TranslationCache, normalize_text, cache_key
+from .service import (
+    GoogleTranslateBackend, CachedTranslator, get_translation_cache,
+    get_translator, translate_text, translate_text_or_original
+)
+
+__all__ = [
+    'TranslationCache', 'normalize_text', 'cache_key',
+    'GoogleTranslateBackend', 'CachedTranslator', 'get_translation_cache',
+    'get_translator', 'translate_text', 'translate_text_or_original'
+]
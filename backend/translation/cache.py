@@ -0,0 +1,130 @@
+"""
+Two-tier translation cache.
+
+Lookups are keyed by (source language, target language, normalized text).
+The first tier is an in-process LRU; the second is a Mongo collection shared
+by all workers whose entries expire through a TTL index. Hit/miss counters
+are kept per process and exposed through ``stats()``.
+"""
+
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC, collapsed whitespace, casefolded."""
+    return " ".join(unicodedata.normalize("NFC", text).split()).casefold()
+
+
+def cache_key(text: str, src: str, tgt: str) -> str:
+    raw = f"{src}\x1f{tgt}\x1f{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    def __init__(self, max_entries: int = 10000, collection=None, ttl_days: int = 30):
+        self.max_entries = max_entries
+        self.collection = collection
+        self.ttl_days = ttl_days
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self._counters = {"memory_hits": 0, "store_hits": 0, "misses": 0, "store_errors": 0}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def remember(self, key: str, translation: str) -> None:
+        with self._lock:
+            self._memory[key] = translation
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_memory(self, key: str) -> Optional[str]:
+        """First-tier lookup only; never blocks on I/O."""
+        with self._lock:
+            translation = self._memory.get(key)
+            if translation is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+        return translation
+
+    def get_store(self, key: str) -> Optional[str]:
+        """Second-tier lookup; promotes hits to the in-process LRU."""
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one({"_id": key}, {"translation": 1})
+            except Exception as e:
+                logger.warning("Translation cache lookup failed: %s", e)
+                self._count("store_errors")
+                doc = None
+            if doc:
+                self._count("store_hits")
+                self.remember(key, doc["translation"])
+                return doc["translation"]
+        self._count("misses")
+        return None
+
+    def get(self, key: str) -> Optional[str]:
+        translation = self.get_memory(key)
+        if translation is None:
+            translation = self.get_store(key)
+        return translation
+
+    def put(self, key: str, text: str, src: str, tgt: str, translation: str) -> None:
+        self.remember(key, translation)
+        self.put_store(key, text, src, tgt, translation)
+
+    def put_store(self, key: str, text: str, src: str, tgt: str, translation: str) -> None:
+        """Second-tier write only."""
+        if self.collection is None:
+            return
+        try:
+            self._ensure_indexes()
+            self.collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "src": src,
+                    "tgt": tgt,
+                    "text": normalize_text(text),
+                    "translation": translation,
+                    "created_at": datetime.utcnow(),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning("Translation cache write failed: %s", e)
+            self._count("store_errors")
+
+    def _ensure_indexes(self) -> None:
+        if self._indexes_ready:
+            return
+        self.collection.create_index(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=self.ttl_days * 24 * 3600,
+        )
+        self._indexes_ready = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._memory)
+        lookups = counters["memory_hits"] + counters["store_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["store_hits"]
+        return {
+            **counters,
+            "memory_entries": size,
+            "max_entries": self.max_entries,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
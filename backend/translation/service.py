@@ -0,0 +1,116 @@
+"""
+Cached Google Translate access shared by the chatbot and recommendation texts.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+
+from deep_translator import GoogleTranslator
+
+import config
+from .cache import TranslationCache, cache_key
+
+
+class GoogleTranslateBackend:
+    """
+    Google Translate via deep_translator.
+
+    deep_translator only has a blocking client, so async calls run on a
+    small dedicated thread pool instead of blocking the event loop.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+
+    def translate_sync(self, text: str, src: str, tgt: str) -> str:
+        return GoogleTranslator(source=src, target=tgt).translate(text)
+
+    async def translate(self, text: str, src: str, tgt: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.translate_sync, text, src, tgt)
+
+
+class CachedTranslator:
+    """Wrap a translator with the two-tier translation cache."""
+
+    def __init__(self, translator, cache: TranslationCache, executor: ThreadPoolExecutor = None):
+        self.translator = translator
+        self.cache = cache
+        self.executor = executor or getattr(translator, "executor", None)
+
+    async def translate(
+        self,
+        text: str,
+        src: str,
+        tgt: str,
+        guard: Optional[Callable[[Callable[[], Awaitable[Any]]], Awaitable[Any]]] = None,
+    ) -> str:
+        """
+        Translate through the cache. ``guard`` (e.g. a DependencyGuard's
+        ``call``) wraps only the upstream request, so cache hits are served
+        even while the upstream is limited or failing.
+        """
+        key = cache_key(text, src, tgt)
+        translation = self.cache.get_memory(key)
+        if translation is not None:
+            return translation
+
+        # The Mongo tier is blocking I/O; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        translation = await loop.run_in_executor(self.executor, self.cache.get_store, key)
+        if translation is not None:
+            return translation
+
+        if guard is None:
+            translation = await self.translator.translate(text, src, tgt)
+        else:
+            translation = await guard(lambda: self.translator.translate(text, src, tgt))
+        self.cache.remember(key, translation)
+        # Write-behind to the shared tier; the response does not wait for it
+        loop.run_in_executor(self.executor, self.cache.put_store, key, text, src, tgt, translation)
+        return translation
+
+    def translate_sync(self, text: str, src: str, tgt: str) -> str:
+        key = cache_key(text, src, tgt)
+        translation = self.cache.get(key)
+        if translation is None:
+            translation = self.translator.translate_sync(text, src, tgt)
+            self.cache.put(key, text, src, tgt, translation)
+        return translation
+
+
+@lru_cache(maxsize=1)
+def get_translation_cache() -> TranslationCache:
+    collection = None
+    if config.TRANSLATION_CACHE_STORE == "mongo":
+        from auth.database import db
+        collection = db.translation_cache
+    return TranslationCache(
+        max_entries=config.TRANSLATION_CACHE_SIZE,
+        collection=collection,
+        ttl_days=config.TRANSLATION_CACHE_TTL_DAYS,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_translator() -> CachedTranslator:
+    """Process-wide cached Google translator."""
+    return CachedTranslator(GoogleTranslateBackend(), get_translation_cache())
+
+
+def translate_text(text: str, src: str, tgt: str) -> str:
+    """Translate a (typically fixed) string synchronously through the cache."""
+    if src == tgt or not text:
+        return text
+    return get_translator().translate_sync(text, src, tgt)
+
+
+def translate_text_or_original(text: str, src: str, tgt: str) -> str:
+    """translate_text, falling back to ``text`` itself if translation fails (best effort)."""
+    try:
+        return translate_text(text, src, tgt)
+    except Exception as e:
+        print(f"Translation to {tgt} failed, keeping {src}: {e}")
+        return text